@@ -1,6 +1,8 @@
 from django.contrib import admin
-from .models import Event, Registration
+from .models import ArchivedEvent, ArchivedRegistration, Event, Registration
 
 # Register your models here.
 admin.site.register(Event),
-admin.site.register(Registration)
\ No newline at end of file
+admin.site.register(Registration)
+admin.site.register(ArchivedEvent)
+admin.site.register(ArchivedRegistration)
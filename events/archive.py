@@ -0,0 +1,51 @@
+from django.db import transaction
+
+from .cache import bump_version
+from .models import ArchivedEvent, ArchivedRegistration, Event, Registration, RegistrationRequest
+from .signals import archiving
+
+ARCHIVE_QUERY_PARAM = 'include_archived'
+
+
+def _copied_fields(model):
+    return [field.attname for field in model._meta.concrete_fields if field.name != 'archived_at']
+
+
+def archive_batch(cutoff, batch_size=1000):
+    # Moves up to batch_size events dated before cutoff, with their
+    # registrations, in one transaction. Returns (events, registrations) moved.
+    event_fields = _copied_fields(ArchivedEvent)
+    registration_fields = _copied_fields(ArchivedRegistration)
+    with transaction.atomic():
+        events = list(Event.objects.select_for_update(skip_locked=True)
+                      .filter(date__lt=cutoff).order_by('id')[:batch_size])
+        if not events:
+            return 0, 0
+        ids = [event.id for event in events]
+        registrations = list(Registration.objects.filter(event_id__in=ids).order_by('id'))
+
+        ArchivedEvent.objects.bulk_create(
+            [ArchivedEvent(**{name: getattr(event, name) for name in event_fields}) for event in events])
+        ArchivedRegistration.objects.bulk_create(
+            [ArchivedRegistration(**{name: getattr(registration, name) for name in registration_fields})
+             for registration in registrations], batch_size=batch_size)
+
+        RegistrationRequest.objects.filter(event_id__in=ids).delete()
+        token = archiving.set(True)
+        try:
+            Registration.objects.filter(event_id__in=ids).delete()
+            Event.objects.filter(id__in=ids).delete()
+        finally:
+            archiving.reset(token)
+        bump_version()
+    return len(events), len(registrations)
+
+
+def include_archived(request):
+    # None (live events only), 'all' or 'only'.
+    value = request.query_params.get(ARCHIVE_QUERY_PARAM, '').strip().lower()
+    if value == 'only':
+        return 'only'
+    if value in ('1', 'true', 'yes', 'all'):
+        return 'all'
+    return None
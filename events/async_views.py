@@ -0,0 +1,154 @@
+import math
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import APIException
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .filters import SEARCH_CURSOR_MESSAGE, EventFilter, RegistrationFilter
+from .models import Event, Registration
+from .pagination import KeysetPagination, keyset_requested
+from .renderers import ORJSONRenderer
+from .serializers import EventSerializer, RegistrationSerializer
+
+# Native async versions of the read endpoints, for deployments served through
+# events_api.asgi. They return the same payloads as the DRF views in views.py.
+
+EVENT_LIST = SimpleNamespace(keyset_ordering=('date', 'id'))
+MY_REGISTRATIONS = SimpleNamespace(keyset_ordering=('registration_date', 'id'))
+
+
+class InvalidPage(Exception):
+    pass
+
+
+def json_response(data, status=200):
+    response = HttpResponse(ORJSONRenderer().render(data), status=status, content_type='application/json')
+    if status == 401:
+        response['WWW-Authenticate'] = JWTAuthentication().authenticate_header(None)
+    return response
+
+
+async def paginate(request, queryset, view):
+    if keyset_requested(request):
+        paginator = KeysetPagination()
+        page_queryset = paginator.get_page_queryset(queryset, request, view)
+        count_mode = request.GET.get(paginator.count_query_param)
+        if count_mode:
+            paginator.count = await sync_to_async(paginator.get_count)(queryset, count_mode)
+        return paginator.set_page([row async for row in page_queryset]), paginator.get_paginated_data
+
+    page_size = api_settings.PAGE_SIZE
+    count = await queryset.acount()
+    try:
+        number = int(request.GET.get('page', 1))
+    except ValueError:
+        raise InvalidPage
+    pages = max(1, math.ceil(count / page_size))
+    if not 1 <= number <= pages:
+        raise InvalidPage
+    rows = [row async for row in queryset[(number - 1) * page_size:number * page_size]]
+
+    def paginated_data(data):
+        url = request.build_absolute_uri()
+        previous = None
+        if number == 2:
+            previous = remove_query_param(url, 'page')
+        elif number > 2:
+            previous = replace_query_param(url, 'page', number - 1)
+        return {
+            'count': count,
+            'next': replace_query_param(url, 'page', number + 1) if number < pages else None,
+            'previous': previous,
+            'results': data,
+        }
+    return rows, paginated_data
+
+
+async def authenticate(request):
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    validated_token = authentication.get_validated_token(raw_token)
+    try:
+        user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken('Token contained no recognizable user identification')
+    user = await User.objects.filter(**{jwt_settings.USER_ID_FIELD: user_id}).afirst()
+    if user is None:
+        raise AuthenticationFailed('User not found', code='user_not_found')
+    if not user.is_active:
+        raise AuthenticationFailed('User is inactive', code='user_inactive')
+    return user
+
+
+@require_safe
+async def event_list(request):
+    queryset = Event.objects.select_related('creator').order_by('id')
+    filterset = EventFilter(request.GET, queryset=queryset)
+    if not filterset.is_valid():
+        return json_response(filterset.errors, status=400)
+    if request.GET.get('q') and keyset_requested(request):
+        return json_response({'pagination': [SEARCH_CURSOR_MESSAGE]}, status=400)
+    queryset = filterset.qs
+    if not await queryset.aexists():
+        return json_response([], status=204)
+    try:
+        rows, paginated_data = await paginate(request, queryset, EVENT_LIST)
+    except InvalidPage:
+        return json_response({'detail': 'Invalid page.'}, status=404)
+    except APIException as exc:
+        return json_response({'detail': exc.detail}, status=exc.status_code)
+    return json_response(paginated_data(EventSerializer(rows, many=True).data))
+
+
+event_list.replica_reads = True
+
+
+@require_safe
+async def event_detail(request, pk):
+    event = await Event.objects.select_related('creator').filter(pk=pk).afirst()
+    if event is None:
+        return json_response({'detail': 'No Event matches the given query.'}, status=404)
+    return json_response(EventSerializer(event).data)
+
+
+event_detail.replica_reads = True
+
+
+@require_safe
+async def my_registrations(request):
+    try:
+        user = await authenticate(request)
+    except (AuthenticationFailed, InvalidToken, TokenError) as exc:
+        return json_response(getattr(exc, 'detail', {'detail': str(exc)}), status=401)
+    if user is None:
+        return json_response({'detail': 'Você deve estar logado para acessar Minhas Inscrições.'}, status=401)
+
+    queryset = (Registration.objects.filter(user_id=user.id).select_related('user', 'event')
+                .order_by(*MY_REGISTRATIONS.keyset_ordering))
+    filterset = RegistrationFilter(request.GET, queryset=queryset)
+    if not filterset.is_valid():
+        return json_response(filterset.errors, status=400)
+    queryset = filterset.qs
+    if not await queryset.aexists():
+        return json_response({'detail': 'Sem inscrições.'}, status=404)
+    try:
+        rows, paginated_data = await paginate(request, queryset, MY_REGISTRATIONS)
+    except InvalidPage:
+        return json_response({'detail': 'Invalid page.'}, status=404)
+    except APIException as exc:
+        return json_response({'detail': exc.detail}, status=exc.status_code)
+    return json_response(paginated_data(RegistrationSerializer(rows, many=True).data))
+
+
+my_registrations.replica_reads = True
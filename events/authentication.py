@@ -0,0 +1,94 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+DEFAULTS = {
+    'TIMEOUT': 30,
+    'MAX_SIZE': 1024,
+}
+
+
+class UserCache:
+    # Per process LRU with a TTL. Users are dropped on save/delete in this
+    # process (events.signals); other processes pick changes up after TIMEOUT.
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def config(self):
+        return {**DEFAULTS, **getattr(settings, 'EVENTS_USER_CACHE', {})}
+
+    def get(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires < time.monotonic():
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+            return user
+
+    def set(self, user_id, user):
+        config = self.config()
+        with self.lock:
+            self.entries[user_id] = (user, time.monotonic() + config['TIMEOUT'])
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > config['MAX_SIZE']:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+user_cache = UserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        user = user_cache.get(str(user_id))
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(str(user_id), user)
+        elif api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed("The user's password has been changed.", code='password_changed')
+        # Each request gets its own instance so nothing leaks between requests.
+        return copy.copy(user)
+
+
+_jwt = JWTAuthentication()
+
+
+def token_user_id(request):
+    # User id of a valid bearer token, read from the claims without a query.
+    header = _jwt.get_header(request)
+    if header is None:
+        return None
+    try:
+        raw_token = _jwt.get_raw_token(header)
+        if raw_token is None:
+            return None
+        return str(_jwt.get_validated_token(raw_token)[api_settings.USER_ID_CLAIM])
+    except (AuthenticationFailed, InvalidToken, KeyError):
+        return None
@@ -0,0 +1,125 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models import Count, Max
+from rest_framework.response import Response
+
+from . import routers
+
+VERSION_KEY = 'events:version'
+
+DEFAULTS = {
+    'ALIAS': 'default',
+    'TIMEOUT': 60,
+    'ENABLED': True,
+    # Whether every worker sees the same cache. None decides from the backend:
+    # locmem lives inside one process, so a version bumped by one worker is
+    # never seen by the others.
+    'SHARED': None,
+}
+
+
+def cache_settings():
+    return {**DEFAULTS, **getattr(settings, 'EVENTS_RESPONSE_CACHE', {})}
+
+
+def get_cache():
+    return caches[cache_settings()['ALIAS']]
+
+
+def cache_is_shared():
+    shared = cache_settings()['SHARED']
+    if shared is None:
+        return not isinstance(get_cache(), (LocMemCache, DummyCache))
+    return shared
+
+
+def table_stamp():
+    # Changes with every event write (updated_at is also touched when a seat
+    # is taken or released) and, through the count, with every delete.
+    from .models import Event
+    stamp = Event.objects.aggregate(changed=Max('updated_at'), total=Count('id'))
+    changed = stamp['changed'].timestamp() if stamp['changed'] else 0
+    return f'{changed:.6f}.{stamp["total"]}'
+
+
+def request_version(request):
+    # current_version() for one request. Without a shared cache it also carries
+    # table_stamp(), one aggregate over indexed columns, so the other workers'
+    # writes still change ETags and cache keys.
+    request = getattr(request, '_request', request)
+    if not hasattr(request, '_events_version'):
+        version = current_version()
+        request._events_version = version if cache_is_shared() else f'{version}.{table_stamp()}'
+    return request._events_version
+
+
+def current_version():
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # A clock based start value never reuses a version that may still have entries.
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _bump():
+    cache = get_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def bump_version():
+    # Bump now and again after commit, so a read that ran before the commit
+    # can not leave a stale entry under the new version.
+    _bump()
+    transaction.on_commit(_bump)
+
+
+def response_cache_key(request, namespace):
+    params = sorted((key, sorted(values)) for key, values in request.GET.lists())
+    raw = f'{request.get_host()}|{request.path}|{params}'
+    digest = hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+    # Bodies read from a replica are kept apart from the primary's, so a
+    # lagging replica never fills the entry a client reading its own writes gets.
+    return f'events:response:{namespace}:{request_version(request)}:{routers.read_alias()}:{digest}'
+
+
+def cached_response(request, namespace):
+    if not cache_settings()['ENABLED'] or request.method != 'GET' or routers.is_sticky():
+        return None
+    return get_cache().get(response_cache_key(request, namespace))
+
+
+class CachedResponseMixin:
+    cache_namespace = None
+    cacheable_statuses = (200, 204)
+
+    def get(self, request, *args, **kwargs):
+        config = cache_settings()
+        if not config['ENABLED']:
+            return super().get(request, *args, **kwargs)
+
+        cache = get_cache()
+        key = response_cache_key(request, self.cache_namespace or type(self).__name__)
+        # Clients that just wrote skip the lookup and read the primary.
+        cached = None if routers.is_sticky() else cache.get(key)
+        if cached is not None:
+            return Response(cached['data'], status=cached['status'])
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code in self.cacheable_statuses:
+            cache.set(key, {
+                'data': response.data,
+                'status': response.status_code,
+                'validators': getattr(request._request, '_events_validators', None),
+            }, config['TIMEOUT'])
+        return response
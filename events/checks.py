@@ -0,0 +1,20 @@
+from django.core.checks import Warning, register
+
+from .cache import cache_is_shared, cache_settings
+from .routers import replica_settings
+
+
+@register()
+def check_replica_sticky_cache(app_configs, **kwargs):
+    # Token clients read their own writes through a key in the events cache
+    # (events.routers). A cache private to each worker only knows the writes
+    # that worker handled, so the others may still send them to a replica.
+    if not replica_settings()['DATABASES'] or cache_is_shared():
+        return []
+    return [Warning(
+        f'O cache "{cache_settings()["ALIAS"]}" não é compartilhado entre os processos; com réplicas, '
+        'clientes com token podem não ler as próprias escritas.',
+        hint='Use um cache compartilhado (Redis, Memcached) ou EVENTS_RESPONSE_CACHE["SHARED"] = True '
+             'se houver um único processo.',
+        id='events.W001',
+    )]
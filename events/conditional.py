@@ -0,0 +1,102 @@
+import hashlib
+from functools import wraps
+
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.utils.http import parse_etags
+from django.views.decorators.http import condition
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .cache import cached_response, request_version
+from .models import Event
+
+SAFE_METHODS = ('GET', 'HEAD')
+PRECONDITION_HEADERS = ('HTTP_IF_MATCH', 'HTTP_IF_UNMODIFIED_SINCE')
+
+
+def _needs_validators(request):
+    # Writes only need them to evaluate If-Match / If-Unmodified-Since.
+    return request.method in SAFE_METHODS or any(header in request.META for header in PRECONDITION_HEADERS)
+
+
+def _representation(request):
+    # The same resource is served as JSON, MessagePack, ... and with ?fields=,
+    # so each representation gets its own ETag.
+    if not hasattr(request, '_events_representation'):
+        renderers = [renderer() for renderer in api_settings.DEFAULT_RENDERER_CLASSES]
+        try:
+            renderer, _ = DefaultContentNegotiation().select_renderer(Request(request), renderers)
+            media_type = renderer.media_type
+        except NotAcceptable:
+            media_type = request.META.get('HTTP_ACCEPT', '')
+        raw = f'{media_type}|{sorted(request.GET.lists())}'
+        request._events_representation = hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()[:12]
+    return request._events_representation
+
+
+def _event_validators(request, pk):
+    # Computed once per request, and taken from the response cache when the
+    # body is cached there, so a cache hit answers 304 without touching the DB.
+    if not hasattr(request, '_events_validators'):
+        cached = cached_response(request, 'event-detail')
+        if cached is not None and cached.get('validators'):
+            request._events_validators = cached['validators']
+        else:
+            updated_at = Event.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+            version = f'{pk}-{updated_at.timestamp():.6f}' if updated_at is not None else None
+            request._events_validators = version, updated_at
+    return request._events_validators
+
+
+def event_etag(request, pk):
+    if not _needs_validators(request):
+        return None
+    version = _event_validators(request, pk)[0]
+    if version is None:
+        return None
+    if request.method not in SAFE_METHODS:
+        # A precondition on a write is about the resource, whichever
+        # representation the client got its ETag from.
+        for etag in parse_etags(request.META.get('HTTP_IF_MATCH', '')):
+            if etag.startswith(f'"{version}-'):
+                return etag
+        return f'"{version}"'
+    return f'"{version}-{_representation(request)}"'
+
+
+def event_last_modified(request, pk):
+    if not _needs_validators(request):
+        return None
+    return _event_validators(request, pk)[1]
+
+
+def event_list_etag(request):
+    # Built from the response cache version, which every event and
+    # registration write bumps, so with a shared cache no query runs before
+    # the view.
+    if request.method not in SAFE_METHODS:
+        return None
+    raw = f'{request.get_host()}|{request.path}|{request_version(request)}|{_representation(request)}'
+    return '"%s"' % hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+
+def _conditional(**validators):
+    def decorator(func):
+        conditional = condition(**validators)(func)
+
+        @wraps(func)
+        def inner(request, *args, **kwargs):
+            response = conditional(request, *args, **kwargs)
+            if request.method in SAFE_METHODS:
+                patch_vary_headers(response, ['Accept'])
+            return response
+        return inner
+    return decorator
+
+
+conditional_event_list = method_decorator(_conditional(etag_func=event_list_etag), name='dispatch')
+conditional_event = method_decorator(
+    _conditional(etag_func=event_etag, last_modified_func=event_last_modified), name='dispatch')
@@ -0,0 +1,64 @@
+import csv
+import json
+from itertools import chain
+
+from rest_framework.renderers import BaseRenderer
+
+EVENT_COLUMNS = ['id', 'title', 'description', 'date', 'time', 'local', 'capacity', 'category', 'creator']
+REGISTRATION_COLUMNS = ['id', 'user', 'registration_date']
+
+
+class StreamRenderer(BaseRenderer):
+    # Export views stream their own body; the renderer only drives content
+    # negotiation and renders error payloads.
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return json.dumps(data, ensure_ascii=False).encode(self.charset)
+
+
+class CSVRenderer(StreamRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class NDJSONRenderer(StreamRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def event_row(event):
+    return [event.id, event.title, event.description, event.date.isoformat(), event.time.isoformat(),
+            event.local, event.capacity, event.category, event.creator.username]
+
+
+def registration_row(registration):
+    return [registration.id, registration.user.username, registration.registration_date.isoformat()]
+
+
+def _batched(lines, size):
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_rows(fmt, columns, rows, batch_size=500):
+    if fmt == 'ndjson':
+        lines = (json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n' for row in rows)
+    else:
+        writer = csv.writer(Echo())
+        lines = (writer.writerow(row) for row in chain([columns], rows))
+    return _batched(lines, batch_size)
+
@@ -0,0 +1,92 @@
+from .metrics import measure
+
+# Columns each public Event field needs, so a sparse request only selects those.
+EVENT_FIELD_COLUMNS = {
+    'id': ['id'],
+    'title': ['title'],
+    'description': ['description'],
+    'date': ['date'],
+    'time': ['time'],
+    'local': ['local'],
+    'capacity': ['capacity'],
+    'category': ['category'],
+    'creator': ['creator__username'],
+    'registrations_count': ['registrations_count'],
+    'remaining_seats': ['capacity', 'registrations_count'],
+}
+
+EVENT_FIELD_GETTERS = {
+    'id': lambda event: event.id,
+    'title': lambda event: event.title,
+    'description': lambda event: event.description,
+    'date': lambda event: event.date.isoformat(),
+    'time': lambda event: event.time.isoformat(),
+    'local': lambda event: event.local,
+    'capacity': lambda event: event.capacity,
+    'category': lambda event: event.category,
+    'creator': lambda event: event.creator.username,
+    'registrations_count': lambda event: event.registrations_count,
+    'remaining_seats': lambda event: max(event.capacity - event.registrations_count, 0),
+}
+
+
+def requested_fields(request, available):
+    if request is None or request.method != 'GET':
+        return list(available)
+    params = request.query_params
+    fields = list(available)
+    if params.get('fields'):
+        wanted = {name.strip() for name in params['fields'].split(',')}
+        fields = [name for name in fields if name in wanted] or fields
+    if params.get('omit'):
+        unwanted = {name.strip() for name in params['omit'].split(',')}
+        fields = [name for name in fields if name not in unwanted] or fields
+    return fields
+
+
+class SparseFieldsMixin:
+    # Serializer side of ?fields= / ?omit=: drops the fields that were not asked for.
+
+    def get_field_names(self, declared_fields, info):
+        names = super().get_field_names(declared_fields, info)
+        return requested_fields(self.context.get('request'), names)
+
+
+class FastEventListSerializer:
+    # Read-only list output built from plain attribute access. Produces the same
+    # values as EventSerializer without the per-field DRF machinery.
+
+    def __init__(self, instances, fields):
+        self.instances = instances
+        self.getters = [(name, EVENT_FIELD_GETTERS[name]) for name in fields]
+
+    @property
+    def data(self):
+        with measure('serialize'):
+            return [{name: getter(event) for name, getter in self.getters} for event in self.instances]
+
+
+class SparseEventViewMixin:
+    # View side: restricts the SELECT to the requested columns and serves list
+    # pages through FastEventListSerializer.
+    always_selected = ('id', 'date')
+
+    def event_fields(self):
+        return requested_fields(self.request, list(EVENT_FIELD_COLUMNS))
+
+    def get_queryset(self):
+        return self.restrict_columns(super().get_queryset())
+
+    def restrict_columns(self, queryset):
+        if self.request.method != 'GET':
+            return queryset
+        fields = self.event_fields()
+        if 'creator' not in fields:
+            queryset = queryset.select_related(None)
+        columns = {column for name in fields for column in EVENT_FIELD_COLUMNS[name]}
+        return queryset.only(*columns, *self.always_selected)
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request.method == 'GET' and kwargs.get('many'):
+            return FastEventListSerializer(args[0], self.event_fields())
+        return super().get_serializer(*args, **kwargs)
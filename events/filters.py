@@ -1,13 +1,33 @@
+import datetime
+import math
+
 import django_filters
-from .models import Event
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+from .models import CategoryField, Event, Registration
+
+SEARCH_CONFIG = 'portuguese'
+SEARCH_FIELDS = ('title', 'description', 'local')
+SEARCH_CURSOR_MESSAGE = 'Paginação por cursor não disponível com busca (q), os resultados são ordenados por relevância.'
+
+
+def search_vector():
+    # Must stay identical to the expression of the event_search_idx GIN index.
+    return SearchVector(*SEARCH_FIELDS, config=SEARCH_CONFIG)
+
 
 class EventFilter(django_filters.FilterSet):
 
-    category = django_filters.CharFilter(field_name='category', lookup_expr='icontains')
+    q = django_filters.CharFilter(method='filter_search')
+    category = django_filters.CharFilter(field_name='category', method='filter_category')
     date = django_filters.IsoDateTimeFilter(field_name='date')
-    year = django_filters.NumberFilter(field_name='date', lookup_expr='year')
-    year_gte = django_filters.NumberFilter(field_name='date', lookup_expr='year__gte')
-    year_lte = django_filters.NumberFilter(field_name='date', lookup_expr='year__lte')
+    date_from = django_filters.DateFilter(field_name='date', lookup_expr='gte')
+    date_to = django_filters.DateFilter(field_name='date', lookup_expr='lte')
+    year = django_filters.NumberFilter(field_name='date', method='filter_year')
+    year_gte = django_filters.NumberFilter(field_name='date', method='filter_year_gte')
+    year_lte = django_filters.NumberFilter(field_name='date', method='filter_year_lte')
     month = django_filters.NumberFilter(field_name='date', lookup_expr='month')
     month_gte = django_filters.NumberFilter(field_name='date', lookup_expr='month__gte')
     month_lte = django_filters.NumberFilter(field_name='date', lookup_expr='month__lte')
@@ -18,3 +38,56 @@ class EventFilter(django_filters.FilterSet):
     class Meta:
         model = Event
         fields = ['category', 'date']
+
+    def filter_search(self, queryset, name, value):
+        if connections[queryset.db].vendor != 'postgresql':
+            condition = Q()
+            for field in SEARCH_FIELDS:
+                condition |= Q(**{f'{field}__icontains': value})
+            return queryset.filter(condition)
+        query = SearchQuery(value, config=SEARCH_CONFIG, search_type='websearch')
+        return (queryset.alias(search=search_vector()).annotate(search_rank=SearchRank(search_vector(), query))
+                .filter(search=query).order_by('-search_rank', 'id'))
+
+    def filter_category(self, queryset, name, value):
+        categories = {slug.strip().lower() for slug in value.split(',')} & CategoryField.codes.keys()
+        if not categories:
+            return queryset.none()
+        return queryset.filter(**{f'{name}__in': sorted(categories)})
+
+    # Years become half-open date ranges so the lookups can use the index on date.
+    def filter_year(self, queryset, name, value):
+        if value != int(value) or not datetime.MINYEAR <= value <= datetime.MAXYEAR:
+            return queryset.none()
+        return self.filter_year_lte(self.filter_year_gte(queryset, name, value), name, value)
+
+    def filter_year_gte(self, queryset, name, value):
+        year = math.ceil(value)
+        if year > datetime.MAXYEAR:
+            return queryset.none()
+        if year <= datetime.MINYEAR:
+            return queryset
+        return queryset.filter(**{f'{name}__gte': datetime.date(year, 1, 1)})
+
+    def filter_year_lte(self, queryset, name, value):
+        year = math.floor(value)
+        if year < datetime.MINYEAR:
+            return queryset.none()
+        if year >= datetime.MAXYEAR:
+            return queryset
+        return queryset.filter(**{f'{name}__lt': datetime.date(year + 1, 1, 1)})
+
+
+class RegistrationFilter(django_filters.FilterSet):
+
+    when = django_filters.ChoiceFilter(choices=[('upcoming', 'Próximos'), ('past', 'Passados')], method='filter_when')
+
+    class Meta:
+        model = Registration
+        fields = ['when']
+
+    def filter_when(self, queryset, name, value):
+        today = timezone.localdate()
+        if value == 'upcoming':
+            return queryset.filter(event__date__gte=today)
+        return queryset.filter(event__date__lt=today)
@@ -0,0 +1,81 @@
+import datetime
+import hashlib
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+DEFAULTS = {
+    'HEADER': 'Idempotency-Key',
+    'TTL': 24 * 60 * 60,
+    # Seconds a key stays "in processing". A worker that dies mid request never
+    # stores its response, so after the lease a retry may run the request again.
+    'LEASE': 30,
+}
+
+
+def idempotency_settings():
+    return {**DEFAULTS, **getattr(settings, 'EVENTS_IDEMPOTENCY', {})}
+
+
+def request_fingerprint(request):
+    digest = hashlib.sha256(f'{request.method}|{request.path}|'.encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+class IdempotencyMixin:
+    # POST with an Idempotency-Key header runs once per user and key. The key
+    # row is committed before the view runs, so a concurrent duplicate hits the
+    # unique constraint and gets 409 instead of a second insert; later retries
+    # get the stored response back. A key still in processing after LEASE
+    # seconds is taken over by the next retry.
+
+    def post(self, request, *args, **kwargs):
+        config = idempotency_settings()
+        key = request.headers.get(config['HEADER'])
+        if not key or not request.user.is_authenticated:
+            return super().post(request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({'detail': 'Idempotency-Key muito longa.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        fingerprint = request_fingerprint(request)
+        now = timezone.now()
+        stale = Q(expires_at__lte=now) | Q(response_status__isnull=True,
+                                          created_at__lte=now - datetime.timedelta(seconds=config['LEASE']))
+        IdempotencyKey.objects.filter(stale, user_id=request.user.id, key=key).delete()
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user_id=request.user.id, key=key, fingerprint=fingerprint,
+                    expires_at=now + datetime.timedelta(seconds=config['TTL']))
+        except IntegrityError:
+            return self.replay(IdempotencyKey.objects.filter(user_id=request.user.id, key=key).first(), fingerprint)
+
+        try:
+            response = super().post(request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+        if response.status_code >= 500:
+            record.delete()
+        else:
+            # update() rather than save(): the row is gone if the lease ran out
+            # and a retry took the key over.
+            IdempotencyKey.objects.filter(pk=record.pk).update(
+                response_status=response.status_code, response_body=response.data)
+        return response
+
+    def replay(self, record, fingerprint):
+        if record is not None and record.fingerprint != fingerprint:
+            return Response({'detail': 'Idempotency-Key já usada com outra requisição.'},
+                            status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        if record is None or record.response_status is None:
+            return Response({'detail': 'Uma requisição com esta Idempotency-Key ainda está em processamento.'},
+                            status=status.HTTP_409_CONFLICT)
+        return Response(record.response_body, status=record.response_status, headers={'Idempotent-Replayed': 'true'})
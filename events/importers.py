@@ -0,0 +1,96 @@
+import csv
+import json
+from itertools import islice
+
+from django.db import transaction
+
+from .cache import bump_version
+from .models import Event
+from .serializers import DUPLICATE_EVENT_MESSAGE as DUPLICATE_MESSAGE, EventImportSerializer
+
+
+INVALID_LINE = ['Linha inválida.']
+INVALID_ENCODING = ['Linha com codificação inválida, envie o arquivo em UTF-8.']
+
+
+def decode_lines(source, invalid):
+    # Lines that are not UTF-8 go on decoded with replacement characters and
+    # their numbers are added to invalid, so one bad line does not stop the import.
+    for number, line in enumerate(source, 1):
+        if isinstance(line, bytes):
+            try:
+                line = line.decode('utf-8-sig' if number == 1 else 'utf-8')
+            except UnicodeDecodeError:
+                invalid.add(number)
+                line = line.decode('utf-8', 'replace')
+        yield line
+
+
+def iter_rows(lines, fmt, invalid=frozenset()):
+    # Yields (line, row) with row a dict, or the errors of a row that can not be read.
+    if fmt == 'ndjson':
+        for number, line in enumerate(lines, 1):
+            if number in invalid:
+                yield number, INVALID_ENCODING
+                continue
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield number, INVALID_LINE
+                continue
+            yield number, row if isinstance(row, dict) else INVALID_LINE
+    else:
+        reader = csv.DictReader(lines)
+        first = 2
+        for row in reader:
+            # A quoted value may span several physical lines.
+            span = range(first, reader.line_num + 1)
+            first = reader.line_num + 1
+            yield reader.line_num, INVALID_ENCODING if any(number in invalid for number in span) else row
+
+
+def import_events(source, fmt, creator, batch_size=1000, max_errors=1000):
+    report = {'created': 0, 'failed': 0, 'errors': []}
+    invalid = set()
+    rows = iter_rows(decode_lines(source, invalid), fmt, invalid)
+    while chunk := list(islice(rows, batch_size)):
+        valid, failed = [], []
+        for line, row in chunk:
+            if not isinstance(row, dict):
+                failed.append((line, row))
+                continue
+            serializer = EventImportSerializer(data=row)
+            if serializer.is_valid():
+                valid.append((line, serializer.validated_data))
+            else:
+                failed.append((line, serializer.errors))
+
+        # One query checks the whole chunk against events already stored,
+        # earlier chunks included.
+        existing = set(Event.objects.filter(
+            title__in={data['title'] for _, data in valid},
+            date__in={data['date'] for _, data in valid},
+            time__in={data['time'] for _, data in valid},
+        ).values_list('title', 'date', 'time')) if valid else set()
+
+        events = []
+        for line, data in valid:
+            key = (data['title'], data['date'], data['time'])
+            if key in existing:
+                failed.append((line, [DUPLICATE_MESSAGE]))
+                continue
+            existing.add(key)
+            events.append(Event(creator=creator, **data))
+
+        if events:
+            with transaction.atomic():
+                Event.objects.bulk_create(events, batch_size=batch_size)
+                bump_version()
+            report['created'] += len(events)
+
+        report['failed'] += len(failed)
+        for line, errors in sorted(failed, key=lambda item: item[0])[:max_errors - len(report['errors'])]:
+            report['errors'].append({'line': line, 'errors': errors})
+    return report
@@ -0,0 +1,31 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from events.archive import archive_batch
+
+
+class Command(BaseCommand):
+    help = 'Move eventos passados e suas inscrições para as tabelas de arquivo.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=365,
+                            help='arquiva eventos com data anterior a hoje menos N dias')
+        parser.add_argument('--before', type=datetime.date.fromisoformat,
+                            help='arquiva eventos com data anterior a esta (AAAA-MM-DD)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--max-batches', type=int, default=0, help='0 = até acabar')
+
+    def handle(self, *args, **options):
+        cutoff = options['before'] or datetime.date.today() - datetime.timedelta(days=options['days'])
+        total_events = total_registrations = batches = 0
+        while not options['max_batches'] or batches < options['max_batches']:
+            events, registrations = archive_batch(cutoff, max(options['batch_size'], 1))
+            if not events:
+                break
+            batches += 1
+            total_events += events
+            total_registrations += registrations
+            self.stdout.write(f'{total_events} eventos, {total_registrations} inscrições arquivados...')
+        self.stdout.write(self.style.SUCCESS(
+            f'{total_events} eventos e {total_registrations} inscrições anteriores a {cutoff.isoformat()} arquivados.'))
@@ -0,0 +1,72 @@
+import copy
+import statistics
+import time
+from importlib.util import find_spec
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.utils import load_backend
+
+from .benchmark import percentile
+
+
+class Command(BaseCommand):
+    help = 'Compara o custo por requisição de conexões novas, persistentes e do pool do psycopg 3.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--query', default='SELECT 1', help='consulta executada a cada requisição')
+
+    def handle(self, *args, **options):
+        base = connections[options['database']].settings_dict
+        modes = {
+            'new': {'CONN_MAX_AGE': 0, 'OPTIONS': self.without_pool(base)},
+            'persistent': {'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True, 'OPTIONS': self.without_pool(base)},
+        }
+        if base['ENGINE'] == 'django.db.backends.postgresql' and find_spec('psycopg') and find_spec('psycopg_pool'):
+            pool = base.get('OPTIONS', {}).get('pool') or True
+            modes['pool'] = {'CONN_MAX_AGE': 0, 'OPTIONS': {**self.without_pool(base), 'pool': pool}}
+        else:
+            self.stdout.write('psycopg 3 / psycopg_pool indisponível: cenário "pool" ignorado.')
+
+        results = {}
+        for name, overrides in modes.items():
+            results[name] = self.run_mode(name, {**copy.deepcopy(base), **overrides}, options)
+            self.stdout.write(f'{name}: p50 {results[name]["p50_ms"]:.3f} ms, '
+                              f'p99 {results[name]["p99_ms"]:.3f} ms, média {results[name]["mean_ms"]:.3f} ms')
+
+        baseline = results['new']['mean_ms']
+        for name, result in results.items():
+            if name != 'new':
+                self.stdout.write(self.style.SUCCESS(
+                    f'{name}: {baseline - result["mean_ms"]:.3f} ms economizados por requisição '
+                    f'({baseline / result["mean_ms"]:.1f}x)'))
+
+    def without_pool(self, settings_dict):
+        return {key: value for key, value in settings_dict.get('OPTIONS', {}).items() if key != 'pool'}
+
+    def run_mode(self, name, settings_dict, options):
+        backend = load_backend(settings_dict['ENGINE'])
+        connection = backend.DatabaseWrapper(settings_dict, alias=f'bench-{name}')
+        latencies = []
+        try:
+            for _ in range(max(options['requests'], 1)):
+                start = time.perf_counter()
+                # Same steps Django runs around a request: close_old_connections()
+                # on request_started and request_finished.
+                connection.close_if_unusable_or_obsolete()
+                with connection.cursor() as cursor:
+                    cursor.execute(options['query'])
+                    cursor.fetchall()
+                connection.close_if_unusable_or_obsolete()
+                latencies.append(time.perf_counter() - start)
+        finally:
+            connection.close()
+            if hasattr(connection, 'close_pool'):
+                connection.close_pool()
+        return {
+            'p50_ms': percentile(latencies, 0.5) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'mean_ms': statistics.fmean(latencies) * 1000,
+        }
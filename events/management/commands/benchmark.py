@@ -0,0 +1,121 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from events.models import Event
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = 'Mede latência, consultas por requisição e vazão dos endpoints da API.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='requisições por cenário')
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--output', default='benchmark.json')
+        parser.add_argument('--prefix', default='seed', help='prefixo dos usuários criados pelo seed_events')
+        parser.add_argument('--password', default='seed')
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--no-cache', action='store_true', help='desliga o cache de respostas')
+        parser.add_argument('--only', nargs='*', help='executa apenas os cenários informados')
+
+    def handle(self, *args, **options):
+        users = list(User.objects.filter(username__startswith=f'{options["prefix"]}_').order_by('id')
+                     .values_list('id', 'username')[:options['requests'] + options['warmup'] + 1])
+        event = Event.objects.order_by('-capacity', 'id').first()
+        if not users or event is None:
+            raise CommandError('Base vazia: rode antes o comando seed_events.')
+
+        anonymous = Client(HTTP_HOST=options['host'])
+        user = User.objects.get(pk=users[0][0])
+        authenticated = Client(HTTP_HOST=options['host'],
+                               HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        list_url = reverse('ListCreate')
+        deep_page = max(1, Event.objects.count() // 20)
+        # Every register call uses a different user; tokens are built up front so
+        # that only the request itself is timed.
+        registrants = iter([Client(HTTP_HOST=options['host'],
+                                   HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(User(pk=user_id)).access_token}')
+                            for user_id, _ in users[1:]])
+
+        def register():
+            return next(registrants, authenticated).post(reverse('Registration', kwargs={'pk': event.pk}))
+
+        scenarios = {
+            'list': lambda: anonymous.get(list_url),
+            'list_category': lambda: anonymous.get(list_url, {'category': event.category}),
+            'list_date': lambda: anonymous.get(list_url, {'date': event.date.isoformat()}),
+            'list_date_range': lambda: anonymous.get(list_url, {'date_from': event.date.isoformat()}),
+            'list_year': lambda: anonymous.get(list_url, {'year': event.date.year}),
+            'list_year_gte': lambda: anonymous.get(list_url, {'year_gte': event.date.year}),
+            'list_month': lambda: anonymous.get(list_url, {'month': event.date.month}),
+            'list_day': lambda: anonymous.get(list_url, {'day': event.date.day}),
+            'list_cursor': lambda: anonymous.get(list_url, {'pagination': 'cursor'}),
+            'list_deep_page': lambda: anonymous.get(list_url, {'page': deep_page}),
+            'detail': lambda: anonymous.get(reverse('ListUpdateDelete', kwargs={'pk': event.pk})),
+            'register': register,
+            'my_registrations': lambda: authenticated.get(reverse('ListMyResgistrations')),
+            'token': lambda: anonymous.post(reverse('TokenObtainPair'),
+                                            {'username': users[0][1], 'password': options['password']}),
+        }
+        if options['only']:
+            scenarios = {name: scenarios[name] for name in options['only'] if name in scenarios}
+
+        # Every scenario comes from one client address, so throttling is off.
+        overrides = {'EVENTS_THROTTLE': {'ENABLED': False}}
+        if options['no_cache']:
+            overrides['EVENTS_RESPONSE_CACHE'] = {'ENABLED': False}
+        results = {}
+        with override_settings(**overrides):
+            for name, request in scenarios.items():
+                results[name] = self.run_scenario(request, options['requests'], options['warmup'])
+                self.stdout.write(f'{name}: p50 {results[name]["p50_ms"]:.2f} ms, '
+                                  f'p99 {results[name]["p99_ms"]:.2f} ms, '
+                                  f'{results[name]["queries_per_request"]:.1f} consultas, '
+                                  f'{results[name]["requests_per_second"]:.0f} req/s')
+
+        report = {
+            'database': connection.vendor,
+            'events': Event.objects.count(),
+            'requests_per_scenario': options['requests'],
+            'response_cache': not options['no_cache'],
+            'scenarios': results,
+        }
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Resultados gravados em {options["output"]}.'))
+
+    def run_scenario(self, request, total, warmup):
+        for _ in range(warmup):
+            request()
+        latencies, queries, statuses = [], [], {}
+        started = time.perf_counter()
+        for _ in range(max(total, 1)):
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                response = request()
+                latencies.append(time.perf_counter() - start)
+            queries.append(len(context))
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        elapsed = time.perf_counter() - started
+        return {
+            'p50_ms': percentile(latencies, 0.5) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'mean_ms': statistics.fmean(latencies) * 1000,
+            'queries_per_request': statistics.fmean(queries),
+            'requests_per_second': len(latencies) / elapsed,
+            'status_codes': statuses,
+        }
@@ -0,0 +1,30 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from events.importers import import_events
+
+
+class Command(BaseCommand):
+    help = 'Importa eventos de um arquivo CSV ou NDJSON em lotes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--creator', required=True, help='username do criador dos eventos')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], default=None)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            creator = User.objects.get(username=options['creator'])
+        except User.DoesNotExist:
+            raise CommandError(f'Usuário {options["creator"]} não encontrado.')
+        fmt = options['format'] or ('ndjson' if options['path'].endswith(('.ndjson', '.jsonl')) else 'csv')
+
+        with open(options['path'], 'rb') as source:
+            report = import_events(source, fmt, creator=creator, batch_size=max(options['batch_size'], 1))
+
+        for error in report['errors']:
+            self.stderr.write(f'linha {error["line"]}: {json.dumps(error["errors"], ensure_ascii=False)}')
+        self.stdout.write(self.style.SUCCESS(f'{report["created"]} eventos criados, {report["failed"]} com erro.'))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from events.registrations import process_registration_requests
+
+
+class Command(BaseCommand):
+    help = 'Processa em lotes as inscrições enfileiradas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--loop', action='store_true', help='continua aguardando novas inscrições')
+        parser.add_argument('--interval', type=float, default=1.0, help='segundos de espera com a fila vazia')
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            processed = process_registration_requests(batch_size=max(options['batch_size'], 1))
+            total += processed
+            if processed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f'{total} inscrições processadas.'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from events.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = 'Remove as Idempotency-Keys expiradas.'
+
+    def handle(self, *args, **options):
+        deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f'{deleted} chaves removidas.'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from events.registrations import recompute_registration_counts
+
+
+class Command(BaseCommand):
+    help = 'Recalcula o número de inscritos de cada evento a partir das inscrições.'
+
+    def handle(self, *args, **options):
+        fixed = recompute_registration_counts()
+        self.stdout.write(self.style.SUCCESS(f'{fixed} eventos corrigidos.'))
@@ -0,0 +1,84 @@
+import datetime
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from events.cache import bump_version
+from events.models import CategoryField, Event, Registration
+
+WORDS = ['python', 'dados', 'nuvem', 'saude', 'startup', 'ensino', 'mercado', 'design', 'redes', 'seguranca',
+         'inovacao', 'carreira', 'mobile', 'web', 'robotica', 'financas', 'bem-estar', 'pesquisa', 'games', 'ia']
+PLACES = ['Auditório Central', 'Sala 101', 'Centro de Convenções', 'Online', 'Laboratório 3', 'Biblioteca']
+
+
+class Command(BaseCommand):
+    help = 'Gera usuários, eventos e inscrições em massa para testes de carga.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--events', type=int, default=10000)
+        parser.add_argument('--registrations-per-event', type=int, default=20,
+                            help='máximo de inscrições por evento')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default='seed', help='prefixo dos usernames gerados')
+        parser.add_argument('--password', default='seed', help='senha de todos os usuários gerados')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = max(options['batch_size'], 1)
+        user_ids = self.create_users(options, batch_size)
+        if not user_ids:
+            self.stderr.write('Nenhum usuário para criar eventos.')
+            return
+
+        today = datetime.date.today()
+        categories = list(CategoryField.codes)
+        start = Event.objects.count()
+        created_events = created_registrations = 0
+        remaining = options['events']
+        while remaining > 0:
+            size = min(batch_size, remaining)
+            events, attendees = [], []
+            for index in range(start + created_events, start + created_events + size):
+                capacity = rng.randint(10, 500)
+                people = rng.sample(user_ids, min(rng.randint(0, options['registrations_per_event']),
+                                                  capacity, len(user_ids)))
+                attendees.append(people)
+                events.append(Event(
+                    title=f'{rng.choice(WORDS)} {rng.choice(WORDS)} #{index}'[:50],
+                    description=' '.join(rng.choices(WORDS, k=rng.randint(20, 80))),
+                    date=today + datetime.timedelta(days=rng.randint(-730, 730)),
+                    time=datetime.time(rng.randint(7, 22), rng.choice([0, 15, 30, 45])),
+                    local=rng.choice(PLACES),
+                    capacity=capacity,
+                    category=rng.choice(categories),
+                    creator_id=rng.choice(user_ids),
+                    registrations_count=len(people),
+                ))
+            with transaction.atomic():
+                Event.objects.bulk_create(events, batch_size=batch_size)
+                registrations = [Registration(event_id=event.pk, user_id=user_id)
+                                 for event, people in zip(events, attendees) for user_id in people]
+                Registration.objects.bulk_create(registrations, batch_size=batch_size)
+            created_events += size
+            created_registrations += len(registrations)
+            remaining -= size
+            self.stdout.write(f'{created_events} eventos, {created_registrations} inscrições...')
+
+        bump_version()
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(user_ids)} usuários, {created_events} eventos e {created_registrations} inscrições criados.'))
+
+    def create_users(self, options, batch_size):
+        prefix = options['prefix']
+        start = User.objects.filter(username__startswith=f'{prefix}_').count()
+        # One hash for every user: hashing per row would dominate the run time.
+        password = make_password(options['password'])
+        users = [User(username=f'{prefix}_{index}', password=password)
+                 for index in range(start, start + options['users'])]
+        User.objects.bulk_create(users, batch_size=batch_size)
+        return list(User.objects.filter(username__startswith=f'{prefix}_').values_list('id', flat=True))
@@ -0,0 +1,255 @@
+import atexit
+import contextvars
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+
+DEFAULTS = {
+    'ENABLED': True,
+    'SERVER_TIMING': False,
+    # Directory shared by the worker processes of one host. Each process writes
+    # its own snapshot there and /metrics adds them up.
+    'MULTIPROCESS_DIR': os.environ.get('EVENTS_METRICS_DIR'),
+    'FLUSH_INTERVAL': 5,
+    'BUCKETS': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+}
+
+_timings = contextvars.ContextVar('events_timings', default=None)
+
+
+def metrics_settings():
+    return {**DEFAULTS, **getattr(settings, 'EVENTS_METRICS', {})}
+
+
+@contextmanager
+def measure(name):
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+class Registry:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.last_flush = 0.0
+        self.reset()
+
+    def reset(self):
+        self.requests = {}
+        self.durations = {}
+        self.totals = {}
+
+    def observe(self, route, method, status, duration, timings, buckets):
+        with self.lock:
+            key = (route, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+            histogram = self.durations.setdefault((route, method), {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0})
+            for index, bound in enumerate(buckets):
+                if duration <= bound:
+                    histogram['buckets'][index] += 1
+            histogram['sum'] += duration
+            histogram['count'] += 1
+
+            for name, value in timings.items():
+                total_key = (name, route, method)
+                self.totals[total_key] = self.totals.get(total_key, 0) + value
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'requests': [[list(key), value] for key, value in self.requests.items()],
+                'durations': [[list(key), dict(value, buckets=list(value['buckets']))]
+                              for key, value in self.durations.items()],
+                'totals': [[list(key), value] for key, value in self.totals.items()],
+            }
+
+    def flush(self, directory, force=False):
+        now = time.monotonic()
+        if not force and now - self.last_flush < metrics_settings()['FLUSH_INTERVAL']:
+            return
+        self.last_flush = now
+        path = os.path.join(directory, f'events-metrics-{os.getpid()}.json')
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w') as output:
+            json.dump(self.snapshot(), output)
+        os.replace(temporary, path)
+
+
+registry = Registry()
+
+
+def _flush_at_exit():
+    directory = metrics_settings()['MULTIPROCESS_DIR']
+    if directory:
+        registry.flush(directory, force=True)
+
+
+atexit.register(_flush_at_exit)
+
+
+def _query_timer(execute, sql, params, many, context):
+    # Installed once on every connection. The timings dict comes from the
+    # request's context, which asgiref copies into sync_to_async threads, so
+    # queries from the async views are counted as well.
+    timings = _timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings['db'] = timings.get('db', 0.0) + time.perf_counter() - start
+        timings['queries'] = timings.get('queries', 0) + 1
+
+
+def _install_query_timer(connection, **kwargs):
+    if _query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_query_timer)
+
+
+def install_query_timer():
+    connection_created.connect(_install_query_timer, dispatch_uid='events_metrics_query_timer')
+    for connection in connections.all(initialized_only=True):
+        _install_query_timer(connection)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        config = metrics_settings()
+        if not config['ENABLED']:
+            return self.get_response(request)
+
+        timings = {}
+        token = _timings.set(timings)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _timings.reset(token)
+        return self.record(request, response, timings, time.perf_counter() - start, config)
+
+    async def __acall__(self, request):
+        config = metrics_settings()
+        if not config['ENABLED']:
+            return await self.get_response(request)
+
+        timings = {}
+        token = _timings.set(timings)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _timings.reset(token)
+        return self.record(request, response, timings, time.perf_counter() - start, config)
+
+    def record(self, request, response, timings, duration, config):
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match else 'unmatched'
+        registry.observe(route, request.method, response.status_code, duration, timings, config['BUCKETS'])
+        if config['MULTIPROCESS_DIR']:
+            registry.flush(config['MULTIPROCESS_DIR'])
+
+        if config['SERVER_TIMING']:
+            response['Server-Timing'] = ', '.join([
+                f'db;desc="{timings.get("queries", 0)} queries";dur={timings.get("db", 0.0) * 1000:.2f}',
+                f'serialize;dur={timings.get("serialize", 0.0) * 1000:.2f}',
+                f'total;dur={duration * 1000:.2f}',
+            ])
+        return response
+
+
+def _collect():
+    directory = metrics_settings()['MULTIPROCESS_DIR']
+    if not directory:
+        return [registry.snapshot()]
+    registry.flush(directory, force=True)
+    snapshots = []
+    for path in glob.glob(os.path.join(directory, 'events-metrics-*.json')):
+        try:
+            with open(path) as source:
+                snapshots.append(json.load(source))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def _labels(**labels):
+    return '{' + ','.join('%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                          for name, value in labels.items()) + '}'
+
+
+def render_metrics():
+    buckets = metrics_settings()['BUCKETS']
+    requests, durations, totals = {}, {}, {}
+    for snapshot in _collect():
+        for key, value in snapshot['requests']:
+            requests[tuple(key)] = requests.get(tuple(key), 0) + value
+        for key, value in snapshot['durations']:
+            merged = durations.setdefault(tuple(key), {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0})
+            merged['buckets'] = [a + b for a, b in zip(merged['buckets'], value['buckets'])]
+            merged['sum'] += value['sum']
+            merged['count'] += value['count']
+        for key, value in snapshot['totals']:
+            totals[tuple(key)] = totals.get(tuple(key), 0) + value
+
+    lines = [
+        '# HELP events_http_requests_total Requests served, by route, method and status.',
+        '# TYPE events_http_requests_total counter',
+    ]
+    for (route, method, status), value in sorted(requests.items()):
+        lines.append(f'events_http_requests_total{_labels(route=route, method=method, status=status)} {value}')
+
+    lines += [
+        '# HELP events_http_request_duration_seconds Request latency, by route and method.',
+        '# TYPE events_http_request_duration_seconds histogram',
+    ]
+    for (route, method), histogram in sorted(durations.items()):
+        for bound, value in zip(buckets, histogram['buckets']):
+            lines.append('events_http_request_duration_seconds_bucket'
+                         f'{_labels(route=route, method=method, le=bound)} {value}')
+        lines.append('events_http_request_duration_seconds_bucket'
+                     f'{_labels(route=route, method=method, le="+Inf")} {histogram["count"]}')
+        lines.append(f'events_http_request_duration_seconds_sum{_labels(route=route, method=method)} {histogram["sum"]}')
+        lines.append(f'events_http_request_duration_seconds_count{_labels(route=route, method=method)} {histogram["count"]}')
+
+    for name, metric, kind, help_text in [
+            ('queries', 'events_db_queries_total', 'counter', 'SQL queries executed.'),
+            ('db', 'events_db_duration_seconds_total', 'counter', 'Time spent running SQL.'),
+            ('serialize', 'events_serializer_duration_seconds_total', 'counter', 'Time spent in serializers.')]:
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} {kind}']
+        for (total_name, route, method), value in sorted(totals.items()):
+            if total_name == name:
+                lines.append(f'{metric}{_labels(route=route, method=method)} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
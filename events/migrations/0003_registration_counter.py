@@ -0,0 +1,48 @@
+# Generated by Django 5.2.2 on 2026-10-18 19:37
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def remove_duplicate_registrations(apps, schema_editor):
+    Registration = apps.get_model('events', 'Registration')
+    db = schema_editor.connection.alias
+    duplicates = (Registration.objects.using(db).values('user_id', 'event_id')
+                  .annotate(first_id=Min('id'), total=Count('id'))
+                  .filter(total__gt=1))
+    for row in duplicates.iterator():
+        (Registration.objects.using(db).filter(user_id=row['user_id'], event_id=row['event_id'])
+         .exclude(id=row['first_id']).delete())
+
+
+def fill_registrations_count(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    Registration = apps.get_model('events', 'Registration')
+    db = schema_editor.connection.alias
+    counts = (Registration.objects.using(db).filter(event_id=OuterRef('pk')).order_by()
+              .values('event_id').annotate(total=Count('id')).values('total'))
+    Event.objects.using(db).update(registrations_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_alter_event_date'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='registrations_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(remove_duplicate_registrations, migrations.RunPython.noop),
+        migrations.RunPython(fill_registrations_count, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='registration',
+            constraint=models.UniqueConstraint(fields=('user', 'event'), name='unique_user_event_registration'),
+        ),
+    ]
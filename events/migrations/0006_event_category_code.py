@@ -0,0 +1,58 @@
+# Generated by Django 5.2.2 on 2026-10-18 19:39
+
+import events.models
+from django.db import migrations, models
+
+CATEGORY_CODES = {'tecnologia': 1, 'educacao': 2, 'saude': 3, 'empreendedorismo': 4}
+
+
+def fill_category_code(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    db = schema_editor.connection.alias
+    for slug, code in CATEGORY_CODES.items():
+        Event.objects.using(db).filter(category=slug).update(category_code=code)
+
+
+def fill_category_slug(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    db = schema_editor.connection.alias
+    for slug, code in CATEGORY_CODES.items():
+        Event.objects.using(db).filter(category_code=code).update(category=slug)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0005_event_category_date_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='event',
+            name='event_category_date_idx',
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='category_code',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.RunPython(fill_category_code, fill_category_slug),
+        migrations.RemoveField(
+            model_name='event',
+            name='category',
+        ),
+        migrations.RenameField(
+            model_name='event',
+            old_name='category_code',
+            new_name='category',
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='category',
+            field=events.models.CategoryField(choices=[('tecnologia', 'Técnologia'), ('educacao', 'Educação'), ('saude', 'Saúde'), ('empreendedorismo', 'Empreendedorismo')]),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['category', 'date'], name='event_category_date_idx'),
+        ),
+    ]
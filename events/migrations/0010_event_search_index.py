@@ -0,0 +1,28 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+INDEX = GinIndex(SearchVector('title', 'description', 'local', config='portuguese'), name='event_search_idx')
+
+
+# The full-text index only exists on PostgreSQL; other backends fall back to
+# plain lookups in EventFilter.filter_search, so it stays out of Event.Meta.
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.add_index(apps.get_model('events', 'Event'), INDEX)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.remove_index(apps.get_model('events', 'Event'), INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0009_registration_request'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.2 on 2026-10-18 19:55
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+IDENTITY_FIELDS = ('title', 'description', 'date', 'time', 'local', 'capacity', 'category', 'creator_id')
+
+
+def merge_duplicate_events(apps, schema_editor):
+    # Only events identical apart from the id are merged: the oldest one keeps
+    # the registrations and tickets of the others. Anything else sharing a
+    # title, date and time, or a merge that would go over capacity, is left for
+    # an operator and the migration stops listing the ids.
+    Event = apps.get_model('events', 'Event')
+    Registration = apps.get_model('events', 'Registration')
+    RegistrationRequest = apps.get_model('events', 'RegistrationRequest')
+    db = schema_editor.connection.alias
+    conflicts = set()
+    identical = (Event.objects.using(db).values(*IDENTITY_FIELDS)
+                 .annotate(first_id=Min('id'), total=Count('id'))
+                 .filter(total__gt=1).order_by('first_id'))
+    for row in identical.iterator():
+        group = Event.objects.using(db).filter(**{name: row[name] for name in IDENTITY_FIELDS})
+        extra = group.exclude(id=row['first_id'])
+        users = set(Registration.objects.using(db).filter(event__in=group).values_list('user_id', flat=True))
+        if len(users) > row['capacity']:
+            conflicts.add(tuple(sorted(group.values_list('id', flat=True))))
+            continue
+        seen = set(Registration.objects.using(db).filter(event_id=row['first_id']).values_list('user_id', flat=True))
+        for registration in Registration.objects.using(db).filter(event__in=extra).order_by('id'):
+            if registration.user_id in seen:
+                registration.delete(using=db)
+                continue
+            seen.add(registration.user_id)
+            registration.event_id = row['first_id']
+            registration.save(using=db, update_fields=['event'])
+        RegistrationRequest.objects.using(db).filter(event__in=extra).update(event_id=row['first_id'])
+        Event.objects.using(db).filter(id=row['first_id']).update(registrations_count=len(seen))
+        extra.delete()
+
+    different = (Event.objects.using(db).values('title', 'date', 'time')
+                 .annotate(total=Count('id')).filter(total__gt=1))
+    for row in different.iterator():
+        conflicts.add(tuple(sorted(Event.objects.using(db).filter(title=row['title'], date=row['date'], time=row['time'])
+                                   .values_list('id', flat=True))))
+    if conflicts:
+        groups = '; '.join(', '.join(str(pk) for pk in ids) for ids in sorted(conflicts))
+        raise RuntimeError(
+            f'Eventos com mesmo título, data e horário que não podem ser unidos automaticamente (ids {groups}). '
+            'Ajuste ou remova os eventos de cada grupo e aplique a migração novamente.')
+
+
+class Migration(migrations.Migration):
+    # Separate from the constraint: on PostgreSQL the deferred FK checks left by
+    # these updates would block the ALTER TABLE in the same transaction.
+
+    dependencies = [
+        ('events', '0010_event_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.2 on 2026-10-18 19:58
+
+import django.db.models.deletion
+import events.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0012_idempotency_and_unique_events'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedEvent',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=50)),
+                ('description', models.TextField()),
+                ('date', models.DateField(db_index=True)),
+                ('time', models.TimeField()),
+                ('local', models.CharField(max_length=50)),
+                ('capacity', models.IntegerField()),
+                ('category', events.models.CategoryField(choices=[('tecnologia', 'Técnologia'), ('educacao', 'Educação'), ('saude', 'Saúde'), ('empreendedorismo', 'Empreendedorismo')])),
+                ('registrations_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedRegistration',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('registration_date', models.DateField()),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='registrations', to='events.archivedevent')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'registration_date'], name='archived_reg_user_date_idx')],
+            },
+        ),
+    ]
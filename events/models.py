@@ -1,6 +1,40 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils.functional import cached_property
+
+CATEGORY_CHOICES = [
+    ('tecnologia', 'Técnologia'),
+    ('educacao', 'Educação'),
+    ('saude', 'Saúde'),
+    ('empreendedorismo', 'Empreendedorismo')]
+
+class CategoryField(models.PositiveSmallIntegerField):
+    # Stored as a small integer code, exposed in Python and in the API as the slug.
+    codes = {'tecnologia': 1, 'educacao': 2, 'saude': 3, 'empreendedorismo': 4}
+    slugs = {code: slug for slug, code in codes.items()}
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('choices', CATEGORY_CHOICES)
+        super().__init__(*args, **kwargs)
+
+    @cached_property
+    def validators(self):
+        return [*self.default_validators, *self._validators]
+
+    def from_db_value(self, value, expression, connection):
+        return self.to_python(value)
+
+    def to_python(self, value):
+        if isinstance(value, int):
+            return self.slugs.get(value, value)
+        return value
+
+    def get_prep_value(self, value):
+        if isinstance(value, str) and value in self.codes:
+            return self.codes[value]
+        return super().get_prep_value(value)
+
 
 class Event(models.Model):
     title = models.CharField(max_length= 50)
@@ -10,13 +44,21 @@ class Event(models.Model):
     local = models.CharField(max_length=50)
     capacity = models.IntegerField(validators=[MinValueValidator(1, message='O valor de capacidade não pode ser menor que 1.'), 
                                                MaxValueValidator(10000, message='O valor de capacidade não pode ser maior que 10000.')])
-    category = models.CharField(
-        max_length=20,choices=[
-                                ('tecnologia', 'Técnologia'),
-                                ('educacao', 'Educação'),
-                                ('saude', 'Saúde'),
-                                ('empreendedorismo', 'Empreendedorismo')])
+    category = CategoryField()
     creator = models.ForeignKey(User, on_delete=models.DO_NOTHING)
+    registrations_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['title', 'date', 'time'], name='unique_event_title_date_time'),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'id'], name='event_date_id_idx'),
+            models.Index(fields=['category', 'date'], name='event_category_date_idx'),
+            # MAX(updated_at) for the response cache stamp (events.cache.table_stamp).
+            models.Index(fields=['updated_at'], name='event_updated_at_idx'),
+        ]
 
     def __str__(self):
         return f'{self.creator} | {self.title}'
@@ -26,5 +68,90 @@ class Registration(models.Model):
     event = models.ForeignKey(Event, on_delete=models.DO_NOTHING)
     registration_date = models.DateField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'event'], name='unique_user_event_registration'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'registration_date'], name='registration_user_date_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user.username} | {self.event.title} | {self.registration_date}'
+
+class RegistrationRequest(models.Model):
+    PENDING = 'pending'
+    STATUS_CHOICES = [
+        (PENDING, 'Pendente'),
+        ('created', 'Inscrito'),
+        ('duplicate', 'Já inscrito'),
+        ('full', 'Lotado'),
+        ('event_not_found', 'Evento não encontrado'),
+        ('user_not_found', 'Usuário não encontrado'),
+        ('forbidden', 'Sem permissão')]
+
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING)
+    event = models.ForeignKey(Event, on_delete=models.DO_NOTHING)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(status='pending'), name='regrequest_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} | {self.event_id} | {self.status}'
+
+class IdempotencyKey(models.Model):
+    # First response to a POST carrying an Idempotency-Key header, replayed for
+    # retries of the same request (events.idempotency).
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_user_idempotency_key'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} | {self.key} | {self.response_status}'
+
+class ArchivedEvent(models.Model):
+    # Past events moved out of Event by the archive_events command. Ids are
+    # kept, so archived rows never collide with live ones.
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=50)
+    description = models.TextField()
+    date = models.DateField(db_index=True)
+    time = models.TimeField()
+    local = models.CharField(max_length=50)
+    capacity = models.IntegerField()
+    category = CategoryField()
+    creator = models.ForeignKey(User, on_delete=models.DO_NOTHING, related_name='+')
+    registrations_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.creator} | {self.title}'
+
+class ArchivedRegistration(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, related_name='+')
+    event = models.ForeignKey(ArchivedEvent, on_delete=models.DO_NOTHING, related_name='registrations')
+    registration_date = models.DateField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'registration_date'], name='archived_reg_user_date_idx'),
+        ]
+
     def __str__(self):
         return f'{self.user.username} | {self.event.title} | {self.registration_date}'
@@ -10,7 +10,7 @@ class IsOwnerOrReadOnly(BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in SAFE_METHODS:
             return True
-        return obj.creator == request.user
+        return obj.creator_id == request.user.id
     
 class IsAdminUser(BasePermission):
     def has_permission(self, request, view):
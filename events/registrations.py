@@ -0,0 +1,110 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.db.models import Case, Count, F, OuterRef, PositiveIntegerField, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from .cache import bump_version
+from .models import Event, Registration, RegistrationRequest
+
+CREATED = 'created'
+DUPLICATE = 'duplicate'
+FULL = 'full'
+EVENT_NOT_FOUND = 'event_not_found'
+USER_NOT_FOUND = 'user_not_found'
+FORBIDDEN = 'forbidden'
+
+MESSAGES = {
+    CREATED: 'Inscrição realizada.',
+    DUPLICATE: 'Usuário já está inscrito neste evento.',
+    FULL: 'Número de inscrições chegou ao limite maximo.',
+    EVENT_NOT_FOUND: 'Evento não encontrado.',
+    USER_NOT_FOUND: 'Usuário não encontrado.',
+    FORBIDDEN: 'Você não tem permissão para inscrever outro usuário neste evento.',
+}
+
+
+# Registers (event_id, user_id) pairs with a fixed number of queries and returns
+# one status per pair. When an actor is given, registering someone else requires
+# the actor to be staff or the creator of the event.
+def register_many(pairs, actor=None, attempts=3):
+    # A single registration committed between reading `existing` and the
+    # insert fails the whole batch on the unique constraint; the batch runs in
+    # a savepoint, so it is retried and that pair comes back as a duplicate.
+    for attempt in range(attempts):
+        try:
+            return _register_many(pairs, actor)
+        except IntegrityError:
+            if attempt == attempts - 1:
+                raise
+
+
+def _register_many(pairs, actor):
+    event_ids = {event_id for event_id, _ in pairs}
+    user_ids = {user_id for _, user_id in pairs if user_id is not None}
+
+    with transaction.atomic():
+        events = {event.pk: event for event in Event.objects.select_for_update()
+                  .filter(pk__in=event_ids).order_by('pk').only('id', 'capacity', 'registrations_count', 'creator_id')}
+        existing = set(Registration.objects.filter(event_id__in=events, user_id__in=user_ids)
+                       .values_list('event_id', 'user_id'))
+        free = {pk: event.capacity - event.registrations_count for pk, event in events.items()}
+
+        statuses, new, added = [], [], Counter()
+        for event_id, user_id in pairs:
+            event = events.get(event_id)
+            if event is None:
+                status = EVENT_NOT_FOUND
+            elif user_id is None:
+                status = USER_NOT_FOUND
+            elif actor is not None and not (actor.is_staff or user_id == actor.id or event.creator_id == actor.id):
+                status = FORBIDDEN
+            elif (event_id, user_id) in existing:
+                status = DUPLICATE
+            elif free[event_id] <= 0:
+                status = FULL
+            else:
+                status = CREATED
+                free[event_id] -= 1
+                added[event_id] += 1
+                existing.add((event_id, user_id))
+                new.append(Registration(event_id=event_id, user_id=user_id))
+            statuses.append(status)
+
+        if new:
+            Registration.objects.bulk_create(new)
+            Event.objects.filter(pk__in=added).update(registrations_count=F('registrations_count') + Case(
+                *[When(pk=pk, then=Value(count)) for pk, count in added.items()],
+                output_field=PositiveIntegerField()), updated_at=timezone.now())
+            bump_version()
+    return statuses
+
+
+# Drains one batch of queued registration requests and records each outcome.
+# skip_locked lets several workers drain the intake side by side.
+def process_registration_requests(batch_size=500):
+    with transaction.atomic():
+        pending = list(RegistrationRequest.objects.select_for_update(skip_locked=True)
+                       .filter(status=RegistrationRequest.PENDING).order_by('id')[:batch_size])
+        if not pending:
+            return 0
+        statuses = register_many([(request.event_id, request.user_id) for request in pending])
+        processed_at = timezone.now()
+        for request, status in zip(pending, statuses):
+            request.status = status
+            request.processed_at = processed_at
+        RegistrationRequest.objects.bulk_update(pending, ['status', 'processed_at'])
+    return len(pending)
+
+
+# Recomputes every drifted counter from the registration table in one UPDATE.
+def recompute_registration_counts():
+    counts = (Registration.objects.filter(event_id=OuterRef('pk')).order_by()
+              .values('event_id').annotate(total=Count('id')).values('total'))
+    actual = Coalesce(Subquery(counts), 0)
+    fixed = (Event.objects.alias(actual=actual).exclude(registrations_count=F('actual'))
+             .update(registrations_count=actual, updated_at=timezone.now()))
+    if fixed:
+        bump_version()
+    return fixed
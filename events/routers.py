@@ -0,0 +1,162 @@
+import contextvars
+import itertools
+import time
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.urls import Resolver404, resolve
+from rest_framework.permissions import SAFE_METHODS
+
+from . import cache
+from .authentication import token_user_id
+
+DEFAULTS = {
+    # alias -> weight. Empty means every query goes to the primary.
+    'DATABASES': {},
+    # Seconds a client keeps reading from the primary after a write.
+    'STICKY_SECONDS': 10,
+    'COOKIE': 'events_primary_until',
+}
+
+PRIMARY = 'default'
+
+# Per request routing state: {'alias': replica or None, 'sticky': bool}. A
+# mutable dict, so the value set by the middleware is seen from the
+# sync_to_async threads the view may run in.
+_state = contextvars.ContextVar('events_replica_state', default=None)
+_counter = itertools.count()
+
+
+def replica_settings():
+    return {**DEFAULTS, **getattr(settings, 'EVENTS_REPLICAS', {})}
+
+
+@lru_cache(maxsize=8)
+def _sequence(weights):
+    # Weighted round-robin: an alias with weight 3 appears three times.
+    return [alias for alias, weight in weights for _ in range(max(int(weight), 0))]
+
+
+def choose_replica():
+    sequence = _sequence(tuple(sorted(replica_settings()['DATABASES'].items())))
+    if not sequence:
+        return PRIMARY
+    return sequence[next(_counter) % len(sequence)]
+
+
+def read_alias():
+    state = _state.get()
+    return (state or {}).get('alias') or PRIMARY
+
+
+def is_sticky():
+    state = _state.get()
+    return bool(state and state.get('sticky'))
+
+
+class PrimaryReplicaRouter:
+    # Reads go to the replica ReplicaRoutingMiddleware picked for the request,
+    # so every query of one response sees the same snapshot. Everything else,
+    # including all writes, uses the primary.
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return read_alias()
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *replica_settings()['DATABASES']}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replica_settings()['DATABASES']:
+            return False
+        return None
+
+
+def _sticky_key(user_id):
+    return f'events:primary:{user_id}'
+
+
+class ReplicaRoutingMiddleware:
+    # Views opt in with `replica_reads = True` (an attribute of the function
+    # for function views). After a successful write the client sticks to the
+    # primary for STICKY_SECONDS, through a cookie and, for token clients, a
+    # per user cache key.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = _state.set(self.route(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        token = _state.set(self.route(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(request, response)
+
+    def route(self, request):
+        # The URL is resolved here rather than in process_view so the state
+        # exists before any middleware or view below runs.
+        config = replica_settings()
+        state = {'alias': None, 'sticky': False}
+        if request.method not in SAFE_METHODS or not config['DATABASES']:
+            return state
+        try:
+            match = resolve(request.path_info, getattr(request, 'urlconf', None))
+        except Resolver404:
+            return state
+        view = getattr(match.func, 'cls', None) or getattr(match.func, 'view_class', None) or match.func
+        if not getattr(view, 'replica_reads', False):
+            return state
+        if self.is_sticky(request, config):
+            state['sticky'] = True
+        else:
+            state['alias'] = choose_replica()
+        return state
+
+    def finish(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            self.stick_to_primary(request, response)
+        return response
+
+    def is_sticky(self, request, config):
+        try:
+            if float(request.COOKIES.get(config['COOKIE'], 0)) > time.time():
+                return True
+        except ValueError:
+            pass
+        user_id = token_user_id(request)
+        return user_id is not None and cache.get_cache().get(_sticky_key(user_id)) is not None
+
+    def stick_to_primary(self, request, response):
+        config = replica_settings()
+        if not config['DATABASES'] or config['STICKY_SECONDS'] <= 0:
+            return
+        response.set_cookie(config['COOKIE'], str(time.time() + config['STICKY_SECONDS']),
+                            max_age=config['STICKY_SECONDS'], httponly=True, samesite='Lax')
+        user_id = token_user_id(request)
+        if user_id is not None:
+            cache.get_cache().set(_sticky_key(user_id), 1, config['STICKY_SECONDS'])
@@ -1,42 +1,139 @@
 from rest_framework import serializers
-from .models import Event, Registration
+from .fieldsets import SparseFieldsMixin
+from .metrics import measure
+from .models import Event, Registration, RegistrationRequest
+from .registrations import MESSAGES as REGISTRATION_MESSAGES, register_many
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
 
+DUPLICATE_EVENT_MESSAGE = 'Já existe um evento neste local, data e horario.'
 
-class EventSerializer(serializers.ModelSerializer):
+
+class MeasuredSerializerMixin:
+    @property
+    def data(self):
+        with measure('serialize'):
+            return super().data
+
+class MeasuredListSerializer(MeasuredSerializerMixin, serializers.ListSerializer):
+    pass
+
+class EventSerializer(SparseFieldsMixin, MeasuredSerializerMixin, serializers.ModelSerializer):
     creator = serializers.SlugRelatedField(read_only=True, slug_field='username')
+    remaining_seats = serializers.SerializerMethodField()
     
     class Meta:
         model = Event
-        fields = ['id', 'title', 'description', 'date', 'time', 'local', 'capacity', 'category', 'creator']
-        read_only_fields = ['creator']
-        
+        list_serializer_class = MeasuredListSerializer
+        fields = ['id', 'title', 'description', 'date', 'time', 'local', 'capacity', 'category', 'creator',
+                  'registrations_count', 'remaining_seats']
+        read_only_fields = ['creator', 'registrations_count']
+        # Uniqueness of (title, date, time) is checked in validate() with the
+        # project's message and enforced by unique_event_title_date_time.
+        validators = []
+
+
+    def get_remaining_seats(self, obj):
+        return max(obj.capacity - obj.registrations_count, 0)
+
+    def validate_capacity(self, value):
+        if self.instance is not None and value < self.instance.registrations_count:
+            raise serializers.ValidationError('A capacidade não pode ser menor que o número de inscritos.')
+        return value
 
     def validate(self, data):
-        exist_event = Event.objects.filter(title=data['title']).filter(date=data['date']).filter(time=data['time'])
-        if len(exist_event) > 0:
-            raise serializers.ValidationError('Já existe um evento neste local, data e horario.')
+        lookup = {name: data.get(name, getattr(self.instance, name, None)) for name in ('title', 'date', 'time')}
+        duplicates = Event.objects.filter(**lookup)
+        if self.instance is not None:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise serializers.ValidationError(DUPLICATE_EVENT_MESSAGE)
         return super().validate(data)
 
-class RegistrationSerializer(serializers.ModelSerializer):
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError(DUPLICATE_EVENT_MESSAGE)
+
+    def update(self, instance, validated_data):
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError(DUPLICATE_EVENT_MESSAGE)
+
+class EventImportSerializer(EventSerializer):
+    # Duplicates are checked once per chunk by events.importers.
+    def validate(self, data):
+        return serializers.ModelSerializer.validate(self, data)
+
+class RegistrationSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
     user = serializers.SlugRelatedField(read_only=True, slug_field='username')
     event = serializers.SlugRelatedField(read_only=True, slug_field='title')
     class Meta:
         model = Registration
+        list_serializer_class = MeasuredListSerializer
         fields = ['user', 'event', 'registration_date']
         read_only_fields = ['user', 'event', 'registration_date']
 
     def create(self, validated_data):
-        number_regristrations = len(Registration.objects.filter(event_id=validated_data['event'].id))
-        event_capacity = Event.objects.get(pk=validated_data['event'].id)
-        duplicate_registration = Registration.objects.filter(event_id=validated_data['event'].id).filter(user_id=validated_data['user'].id)
-        
-        if len(duplicate_registration) >= 1:
+        event = validated_data['event']
+        try:
+            with transaction.atomic():
+                # The event row is locked before the registration is inserted,
+                # in the same order as registrations.register_many, so the two
+                # paths can not deadlock on the same pair.
+                reserved = (Event.objects.filter(pk=event.pk, registrations_count__lt=F('capacity'))
+                            .update(registrations_count=F('registrations_count') + 1, updated_at=timezone.now()))
+                if not reserved:
+                    if Registration.objects.filter(event_id=event.pk, user_id=validated_data['user'].pk).exists():
+                        raise serializers.ValidationError('Você já está inscrito neste evento.')
+                    raise serializers.ValidationError('Número de inscrições chegou ao limite maximo.', code='full_capacity')
+                registration = super().create(validated_data)
+        except IntegrityError:
             raise serializers.ValidationError('Você já está inscrito neste evento.')
-        if number_regristrations >= event_capacity.capacity:
-            raise serializers.ValidationError('Número de inscrições chegou ao limite maximo.', code='full_capacity')
-        return super().create(validated_data)
+        return registration
         
+class RegistrationRequestSerializer(serializers.ModelSerializer):
+    ticket = serializers.IntegerField(source='id', read_only=True)
+    detail = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RegistrationRequest
+        fields = ['ticket', 'event', 'status', 'detail', 'created_at', 'processed_at']
+        read_only_fields = fields
+
+    def get_detail(self, obj):
+        if obj.status == RegistrationRequest.PENDING:
+            return 'Inscrição na fila de processamento.'
+        return REGISTRATION_MESSAGES[obj.status]
+
+class BulkRegistrationItemSerializer(serializers.Serializer):
+    event = serializers.IntegerField(min_value=1)
+    user = serializers.CharField(required=False)
+
+class BulkRegistrationSerializer(serializers.Serializer):
+    registrations = BulkRegistrationItemSerializer(many=True, allow_empty=False, max_length=500)
+
+    def create(self, validated_data):
+        actor = validated_data['actor']
+        items = validated_data['registrations']
+        usernames = {item['user'] for item in items if 'user' in item}
+        user_ids = dict(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+        user_ids[actor.username] = actor.id
+
+        pairs = [(item['event'], user_ids.get(item.get('user', actor.username))) for item in items]
+        try:
+            statuses = register_many(pairs, actor=actor)
+        except IntegrityError:
+            raise serializers.ValidationError('Conflito ao processar as inscrições, tente novamente.')
+        return [{'event': item['event'], 'user': item.get('user', actor.username), 'status': status,
+                 'detail': REGISTRATION_MESSAGES[status]} for item, status in zip(items, statuses)]
+
 class UserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
     password_confirmation = serializers.CharField(write_only=True)
@@ -0,0 +1,35 @@
+import contextvars
+
+from django.contrib.auth.models import User
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .authentication import user_cache
+from .cache import bump_version
+from .models import Event, Registration
+
+# Set by events.archive while it deletes whole events: their seats need no
+# release, and the response cache is bumped once for the batch.
+archiving = contextvars.ContextVar('events_archiving', default=False)
+
+
+@receiver([post_save, post_delete], sender=Event)
+@receiver([post_save, post_delete], sender=Registration)
+def invalidate_event_responses(sender, **kwargs):
+    if not archiving.get():
+        bump_version()
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_cache.invalidate(str(instance.pk))
+
+
+@receiver(post_delete, sender=Registration)
+def release_seat(sender, instance, **kwargs):
+    if archiving.get():
+        return
+    Event.objects.filter(pk=instance.event_id, registrations_count__gt=0).update(
+        registrations_count=F('registrations_count') - 1, updated_at=timezone.now())
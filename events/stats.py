@@ -0,0 +1,34 @@
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+
+GROUPS = ('category', 'month', 'day')
+
+
+def _aggregates():
+    return {
+        'events': Count('id'),
+        'capacity': Coalesce(Sum('capacity'), 0),
+        'registrations': Coalesce(Sum('registrations_count'), 0),
+    }
+
+
+def event_stats(queryset, groups=GROUPS):
+    # One aggregate query for the totals plus one GROUP BY per breakdown. The
+    # ordering of the filtered queryset (search rank, id) is dropped so it does
+    # not end up in the GROUP BY.
+    queryset = queryset.order_by()
+    stats = {'totals': queryset.aggregate(**_aggregates())}
+    if 'category' in groups:
+        stats['by_category'] = list(queryset.values('category').annotate(**_aggregates()).order_by('category'))
+    if 'month' in groups:
+        stats['by_month'] = [
+            {**row, 'month': row['month'].strftime('%Y-%m')}
+            for row in queryset.annotate(month=TruncMonth('date')).values('month')
+            .annotate(**_aggregates()).order_by('month')
+        ]
+    if 'day' in groups:
+        stats['by_day'] = [
+            {**row, 'date': row['date'].isoformat()}
+            for row in queryset.values('date').annotate(**_aggregates()).order_by('date')
+        ]
+    return stats
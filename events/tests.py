@@ -1,12 +1,43 @@
-from rest_framework.test import APIClient
+import base64
+import datetime
+import io
+import json
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.exceptions import AuthenticationFailed
 import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
 from django.urls import reverse
 from rest_framework_simplejwt.tokens import RefreshToken
-from .models import Event, Registration
+from .models import ArchivedEvent, ArchivedRegistration, Event, IdempotencyKey, Registration, RegistrationRequest
+from .registrations import process_registration_requests
 from django.contrib.auth.models import User
+from django.test import AsyncClient, Client
 from django.test.utils import CaptureQueriesContext
-from django.db import connection
+from django.db import connection, connections
+from django.core.management import call_command
+from django.utils import timezone
+from . import cache as cache_module
+from .cache import get_cache
+from django.core.cache.backends.locmem import LocMemCache
+from .serializers import EventSerializer
+from .authentication import CachedJWTAuthentication, user_cache
+from .renderers import ORJSONRenderer
+from . import routers
+from .idempotency import request_fingerprint
+from .throttling import SlidingWindowThrottle, local_blocks
+from .metrics import MetricsMiddleware
+from .checks import check_replica_sticky_cache
 
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    get_cache().clear()
+    local_blocks.clear()
+
+@pytest.fixture
+def shared_cache(settings):
+    # Tests run in one process, where the locmem cache is seen by every request.
+    settings.EVENTS_RESPONSE_CACHE = {**settings.EVENTS_RESPONSE_CACHE, 'SHARED': True}
 
 @pytest.fixture
 def api_client():
@@ -167,6 +198,18 @@ def test_duplicate_user_registration(auth_client, event):
     assert response.status_code == 400
     assert response.data[0] == 'Você já está inscrito neste evento.'
 
+@pytest.mark.django_db
+def test_registration_locks_event_before_insert(auth_client, event):
+    # Same lock order as register_many, so the two paths can not deadlock.
+    with CaptureQueriesContext(connection) as ctx:
+        response = auth_client.post(reverse('Registration', kwargs={'pk': event.pk}), format='json')
+
+    assert response.status_code == 201
+    sql = [query['sql'] for query in ctx]
+    update = next(i for i, query in enumerate(sql) if query.startswith('UPDATE "events_event"'))
+    insert = next(i for i, query in enumerate(sql) if query.startswith('INSERT INTO "events_registration"'))
+    assert update < insert
+
 @pytest.mark.django_db
 def test_event_filter_category(api_client, event):
     category = 'tecnologia'
@@ -367,3 +410,833 @@ def test_event_queryset_optimized(api_client, event):
         response = api_client.get(url, format='json')
        
         assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_registration_query_count_is_constant(auth_client, event):
+    event.capacity = 100
+    event.save()
+    url = reverse('Registration', kwargs={'pk': event.pk})
+    others = [User.objects.create_user(username=f'user{i}', password='x') for i in range(5)]
+    Registration.objects.bulk_create([Registration(user=other, event=event) for other in others[:1]])
+
+    with CaptureQueriesContext(connection) as first:
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(RefreshToken.for_user(others[1]).access_token))
+        assert client.post(url, format='json').status_code == 201
+    Registration.objects.bulk_create([Registration(user=other, event=event) for other in others[2:]])
+    with CaptureQueriesContext(connection) as second:
+        assert auth_client.post(url, format='json').status_code == 201
+
+    assert len(first) == len(second)
+    event.refresh_from_db()
+    assert event.registrations_count == 2
+
+
+@pytest.mark.django_db
+def test_event_list_cursor_pagination(api_client, event, user):
+    for day in (10, 11, 12):
+        Event.objects.create(title=f'evento {day}', description='descricao', date=f'2025-06-{day}', time='10:00:00',
+                             local='qualquer lugar', capacity=10, category='saude', creator=user)
+    url = reverse('ListCreate') + '?pagination=cursor&page_size=3&count=exact'
+    response = api_client.get(url, format='json')
+
+    assert response.status_code == 200
+    assert response.data['count'] == 4
+    assert [item['date'] for item in response.data['results']] == ['2025-06-10', '2025-06-11', '2025-06-12']
+
+    response = api_client.get(response.data['next'], format='json')
+
+    assert [item['id'] for item in response.data['results']] == [event.pk]
+    assert response.data['next'] is None
+
+@pytest.mark.django_db
+def test_event_list_malformed_cursor(api_client, event):
+    url = reverse('ListCreate') + '?pagination=cursor'
+    for position in (['not-a-date', '1'], ['2025-06-13', 'x'], [None, 1], [{}, 1]):
+        cursor = base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+        response = api_client.get(url + '&cursor=' + cursor, format='json')
+
+        assert response.status_code == 404
+
+@pytest.mark.django_db
+def test_async_event_list_malformed_cursor(event):
+    url = reverse('AsyncEventList') + '?cursor='
+    for cursor in ('@@@', base64.urlsafe_b64encode(json.dumps(['x', '1']).encode()).decode()):
+        response = async_to_sync(AsyncClient().get)(url + cursor)
+
+        assert response.status_code == 404
+        assert json.loads(response.content) == {'detail': 'Cursor inválido.'}
+
+
+@pytest.mark.django_db
+def test_event_filter_year_uses_date_range(api_client, event):
+    url = reverse('ListCreate') + '?year=2025&category=tecnologia'
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get(url, format='json')
+
+    assert response.status_code == 200
+    assert all('extract' not in query['sql'].lower() and 'strftime' not in query['sql'].lower() for query in ctx)
+
+@pytest.mark.django_db
+def test_event_filter_date_range(api_client, event):
+    url = reverse('ListCreate') + '?date_from=2025-06-01&date_to=2025-06-13'
+    response = api_client.get(url, format='json')
+
+    assert response.status_code == 200
+    assert response.data['results'][0]['id'] == event.pk
+
+    url = reverse('ListCreate') + '?date_from=2025-06-14'
+    response = api_client.get(url, format='json')
+
+    assert response.status_code == 204
+
+
+@pytest.mark.django_db
+def test_event_filter_multiple_categories(api_client, event, user):
+    Event.objects.create(title='outro evento', description='descricao', date='2025-06-14', time='10:00:00',
+                         local='qualquer lugar', capacity=10, category='saude', creator=user)
+    url = reverse('ListCreate') + '?category=tecnologia,saude'
+    response = api_client.get(url, format='json')
+
+    assert response.status_code == 200
+    assert sorted(item['category'] for item in response.data['results']) == ['saude', 'tecnologia']
+    assert Event.objects.values_list('category', flat=True).get(pk=event.pk) == 'tecnologia'
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT category FROM events_event WHERE id = %s', [event.pk])
+        assert cursor.fetchone()[0] == 1
+
+@pytest.mark.django_db
+def test_event_filter_category_is_exact(api_client, event):
+    url = reverse('ListCreate') + '?category=tecno'
+    response = api_client.get(url, format='json')
+
+    assert response.status_code == 204
+
+
+@pytest.mark.django_db
+def test_event_list_is_served_from_cache(api_client, event, user, shared_cache):
+    url = reverse('ListCreate')
+    api_client.get(url, format='json')
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get(url, format='json')
+
+    assert response.status_code == 200
+    assert len(ctx) == 0
+
+    Event.objects.create(title='novo evento', description='descricao', date='2025-06-14', time='10:00:00',
+                         local='qualquer lugar', capacity=10, category='saude', creator=user)
+    response = api_client.get(url, format='json')
+
+    assert response.data['count'] == 2
+
+
+@pytest.mark.django_db
+def test_event_detail_conditional_get(api_client, event):
+    url = reverse('ListUpdateDelete', kwargs={'pk': event.pk})
+    response = api_client.get(url, format='json')
+    etag = response['ETag']
+
+    assert response.status_code == 200
+    assert response.has_header('Last-Modified')
+
+    response = api_client.get(url, format='json', HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 304
+
+    response = api_client.get(reverse('ListCreate'), format='json')
+    response = api_client.get(reverse('ListCreate'), format='json', HTTP_IF_NONE_MATCH=response['ETag'])
+
+    assert response.status_code == 304
+
+@pytest.mark.django_db
+def test_event_update_if_match(auth_client, event):
+    url = reverse('ListUpdateDelete', kwargs={'pk': event.pk})
+    etag = auth_client.get(url, format='json')['ETag']
+    response = auth_client.patch(url, {'local': 'outro lugar'}, format='json', HTTP_IF_MATCH='"outra-versao"')
+
+    assert response.status_code == 412
+
+    response = auth_client.delete(url, HTTP_IF_MATCH=etag)
+
+    assert response.status_code == 204
+
+@pytest.mark.django_db
+def test_event_etag_varies_by_representation(api_client, event):
+    url = reverse('ListUpdateDelete', kwargs={'pk': event.pk})
+    full = api_client.get(url, format='json')
+    sparse = api_client.get(url + '?fields=id,title', format='json')
+
+    assert full['ETag'] != sparse['ETag']
+    assert 'Accept' in full['Vary']
+    assert api_client.get(url, HTTP_ACCEPT='text/html', HTTP_IF_NONE_MATCH=full['ETag']).status_code == 200
+
+@pytest.mark.django_db
+def test_event_list_etag_runs_no_aggregate(api_client, event, shared_cache):
+    url = reverse('ListCreate') + '?pagination=cursor'
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get(url, format='json')
+
+    assert response.status_code == 200
+    assert not any('MAX(' in query['sql'].upper() for query in ctx)
+    assert api_client.get(url, format='json', HTTP_IF_NONE_MATCH=response['ETag']).status_code == 304
+
+@pytest.mark.django_db
+def test_event_list_etag_changes_across_workers(api_client, auth_client, event, monkeypatch):
+    # Two locmem caches stand in for two worker processes.
+    workers = {'a': LocMemCache('worker-a', {}), 'b': LocMemCache('worker-b', {})}
+    worker = 'b'
+    monkeypatch.setattr(cache_module, 'get_cache', lambda: workers[worker])
+    url = reverse('ListCreate')
+    etag = api_client.get(url, format='json')['ETag']
+
+    worker = 'a'
+    response = auth_client.post(url, {'title': 'novo evento', 'description': 'd', 'date': '2025-06-14',
+                                      'time': '10:00:00', 'local': 'sala', 'capacity': 10,
+                                      'category': 'saude'}, format='json')
+    assert response.status_code == 201
+
+    worker = 'b'
+    response = api_client.get(url, format='json', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.data['count'] == 2
+
+
+@pytest.mark.django_db
+def test_bulk_registration(auth_client, event, user):
+    event.capacity = 2
+    event.save()
+    others = [User.objects.create_user(username=f'aluno{i}', password='x') for i in range(3)]
+    data = {'registrations': [
+        {'event': event.pk},
+        {'event': event.pk},
+        {'event': event.pk, 'user': 'aluno0'},
+        {'event': event.pk, 'user': 'aluno1'},
+        {'event': event.pk, 'user': 'ninguem'},
+        {'event': 999999},
+    ]}
+    url = reverse('BulkRegistration')
+    with CaptureQueriesContext(connection) as ctx:
+        response = auth_client.post(url, data, format='json')
+
+    assert response.status_code == 200
+    assert [item['status'] for item in response.data['results']] == [
+        'created', 'duplicate', 'created', 'full', 'user_not_found', 'event_not_found']
+    assert len(ctx) <= 10
+    event.refresh_from_db()
+    assert event.registrations_count == 2
+    assert Registration.objects.filter(event=event).count() == 2
+
+@pytest.mark.django_db
+def test_bulk_registration_other_user_requires_organizer(api_client, event):
+    intruder = User.objects.create_user(username='gabriel', password='gabriel')
+    api_client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(RefreshToken.for_user(intruder).access_token))
+    data = {'registrations': [{'event': event.pk, 'user': 'rafael'}, {'event': event.pk}]}
+    response = api_client.post(reverse('BulkRegistration'), data, format='json')
+
+    assert [item['status'] for item in response.data['results']] == ['forbidden', 'created']
+
+
+@pytest.mark.django_db
+def test_import_events_csv(auth_client, event, user):
+    body = (
+        'title,description,date,time,local,capacity,category\n'
+        'importado 1,descricao,2025-07-01,10:00:00,auditorio,50,educacao\n'
+        'importado 1,descricao,2025-07-01,10:00:00,auditorio,50,educacao\n'
+        'titulo de teste,descricao,2025-06-13,16:37:21,auditorio,50,educacao\n'
+        'importado 2,descricao,2025-07-02,10:00:00,auditorio,0,educacao\n'
+        'importado 3,descricao,2025-07-03,10:00:00,auditorio,10,saude\n'
+    )
+    url = reverse('ImportEvents') + '?batch_size=2'
+    response = auth_client.post(url, data=body, content_type='text/csv')
+
+    assert response.status_code == 200
+    assert response.data['created'] == 2
+    assert [error['line'] for error in response.data['errors']] == [3, 4, 5]
+    assert Event.objects.filter(title__startswith='importado', creator=user).count() == 2
+
+@pytest.mark.django_db
+def test_import_events_reports_invalid_encoding(auth_client, user):
+    body = (
+        'title,description,date,time,local,capacity,category\n'
+        'importado 1,descrição,2025-07-01,10:00:00,auditório,50,educacao\n'
+    ).encode('latin-1') + 'importado 2,descrição,2025-07-02,10:00:00,sala,50,educacao\n'.encode()
+    response = auth_client.post(reverse('ImportEvents'), data=body, content_type='text/csv')
+
+    assert response.status_code == 200
+    assert response.data['created'] == 1
+    assert response.data['errors'] == [
+        {'line': 2, 'errors': ['Linha com codificação inválida, envie o arquivo em UTF-8.']}]
+    assert Event.objects.get(title='importado 2').description == 'descrição'
+
+@pytest.mark.django_db
+def test_import_events_command(tmp_path, user):
+    path = tmp_path / 'eventos.ndjson'
+    path.write_text(
+        '{"title": "evento ndjson", "description": "d", "date": "2025-08-01", "time": "09:00", '
+        '"local": "sala", "capacity": 5, "category": "saude"}\n'
+        'nao e json\n', encoding='utf-8')
+    call_command('import_events', str(path), creator=user.username, stderr=io.StringIO(), stdout=io.StringIO())
+
+    assert Event.objects.filter(title='evento ndjson').count() == 1
+
+
+@pytest.mark.django_db
+def test_export_events_csv(api_client, event):
+    response = api_client.get(reverse('ExportEvents') + '?category=tecnologia')
+    lines = b''.join(response.streaming_content).decode().splitlines()
+
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/csv')
+    assert lines[0] == 'id,title,description,date,time,local,capacity,category,creator'
+    assert lines[1] == f'{event.pk},titulo de teste,descricao do teste,2025-06-13,16:37:21,qualquer lugar,1,tecnologia,rafael'
+
+@pytest.mark.django_db
+def test_export_registrations_organizer_only(auth_client, api_client, event, user):
+    Registration.objects.create(user=user, event=event)
+    url = reverse('ExportRegistrations', kwargs={'pk': event.pk}) + '?format=ndjson'
+    response = auth_client.get(url)
+    rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+    assert response.status_code == 200
+    assert rows[0]['user'] == 'rafael'
+
+    intruder = User.objects.create_user(username='gabriel', password='gabriel')
+    api_client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(RefreshToken.for_user(intruder).access_token))
+
+    assert api_client.get(url).status_code == 403
+
+
+@pytest.mark.django_db
+def test_async_event_list_matches_sync(api_client, event):
+    url = '?category=tecnologia&year=2025'
+    expected = api_client.get(reverse('ListCreate') + url, format='json')
+    response = Client().get(reverse('AsyncEventList') + url)
+
+    assert response.status_code == 200
+    assert response.json() == json.loads(json.dumps(expected.data))
+
+    response = Client().get(reverse('AsyncEventDetail', kwargs={'pk': event.pk}))
+
+    assert response.json()['title'] == event.title
+
+@pytest.mark.django_db
+def test_async_my_registrations(auth_client, event, user):
+    url = reverse('AsyncMyRegistrations')
+
+    assert Client().get(url).status_code == 401
+
+    token = str(RefreshToken.for_user(user).access_token)
+    response = Client().get(url, HTTP_AUTHORIZATION='Bearer ' + token)
+
+    assert response.status_code == 404
+
+    auth_client.post(reverse('Registration', kwargs={'pk': event.pk}), format='json')
+    response = Client().get(url, HTTP_AUTHORIZATION='Bearer ' + token)
+
+    assert response.status_code == 200
+    assert response.json()['results'][0]['event'] == event.title
+
+
+@pytest.mark.django_db
+def test_cached_jwt_authentication(user):
+    user_cache.clear()
+    token = str(RefreshToken.for_user(user).access_token)
+    request = APIRequestFactory().get('/', HTTP_AUTHORIZATION='Bearer ' + token)
+    CachedJWTAuthentication().authenticate(request)
+    with CaptureQueriesContext(connection) as ctx:
+        authenticated, _ = CachedJWTAuthentication().authenticate(request)
+
+    assert len(ctx) == 0
+    assert authenticated.pk == user.pk
+
+    user.is_active = False
+    user.save()
+
+    with pytest.raises(AuthenticationFailed):
+        CachedJWTAuthentication().authenticate(request)
+
+
+@pytest.mark.django_db
+def test_my_registrations_single_query_page(auth_client, user):
+    events = [Event.objects.create(title=f'evento {day}', description='descricao', date=f'2999-01-{day:02d}',
+                                   time='10:00:00', local='sala', capacity=10, category='saude', creator=user)
+              for day in range(1, 6)]
+    past = Event.objects.create(title='evento antigo', description='descricao', date='2001-01-01',
+                                time='10:00:00', local='sala', capacity=10, category='saude', creator=user)
+    Registration.objects.bulk_create([Registration(user=user, event=event) for event in [*events, past]])
+    url = reverse('ListMyResgistrations') + '?pagination=cursor&page_size=2&when=upcoming'
+    with CaptureQueriesContext(connection) as ctx:
+        response = auth_client.get(url, format='json')
+
+    assert response.status_code == 200
+    assert len(response.data['results']) == 2
+    assert len(ctx) == 3
+
+    titles = []
+    while url:
+        response = auth_client.get(url, format='json')
+        titles += [item['event'] for item in response.data['results']]
+        url = response.data['next']
+
+    assert titles == [event.title for event in events]
+
+    response = auth_client.get(reverse('ListMyResgistrations') + '?when=past', format='json')
+
+    assert [item['event'] for item in response.data['results']] == ['evento antigo']
+
+
+@pytest.mark.django_db
+def test_queued_registration(auth_client, event, user, settings):
+    settings.EVENTS_REGISTRATION_MODE = 'queued'
+    url = reverse('Registration', kwargs={'pk': event.pk})
+    first = auth_client.post(url, format='json')
+    second = auth_client.post(url, format='json')
+
+    assert first.status_code == 202
+    assert first.data['status'] == 'pending'
+    assert Registration.objects.count() == 0
+
+    call_command('process_registrations', stdout=io.StringIO())
+    first = auth_client.get(first.data['url'], format='json')
+    second = auth_client.get(second.data['url'], format='json')
+
+    assert first.data['status'] == 'created'
+    assert second.data['status'] == 'duplicate'
+    event.refresh_from_db()
+    assert event.registrations_count == 1
+
+@pytest.mark.django_db
+def test_process_registrations_survives_concurrent_insert(event, user, monkeypatch):
+    ticket = RegistrationRequest.objects.create(user=user, event=event)
+    bulk_create = Registration.objects.bulk_create
+
+    def racing_bulk_create(objs, *args, **kwargs):
+        # The same pair is inserted after `existing` was read. Here it lives in
+        # the rolled back savepoint, so the retry creates it instead of
+        # reporting a duplicate.
+        monkeypatch.setattr(Registration.objects, 'bulk_create', bulk_create)
+        Registration.objects.bulk_create([Registration(user=user, event=event)])
+        return bulk_create(objs, *args, **kwargs)
+
+    monkeypatch.setattr(Registration.objects, 'bulk_create', racing_bulk_create)
+    assert process_registration_requests() == 1
+
+    ticket.refresh_from_db()
+    assert ticket.status == 'created'
+    assert Registration.objects.filter(event=event).count() == 1
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint(api_client, event, settings, tmp_path):
+    settings.EVENTS_METRICS = {'SERVER_TIMING': True, 'MULTIPROCESS_DIR': str(tmp_path)}
+    response = api_client.get(reverse('ListCreate'), format='json')
+
+    assert 'db;desc=' in response['Server-Timing']
+
+    (tmp_path / 'events-metrics-0.json').write_text(json.dumps({
+        'requests': [[['api/events', 'GET', '200'], 5]], 'durations': [], 'totals': []}))
+    body = api_client.get(reverse('metrics')).content.decode()
+
+    assert 'events_http_requests_total{route="api/events",method="GET",status="200"}' in body
+    assert 'events_http_request_duration_seconds_bucket{route="api/events",method="GET",le="+Inf"}' in body
+    assert 'events_db_queries_total{route="api/events",method="GET"}' in body
+    counts = [line for line in body.splitlines()
+              if line.startswith('events_http_requests_total{route="api/events",method="GET",status="200"}')]
+    assert int(counts[0].split()[-1]) >= 6
+
+@pytest.mark.django_db
+def test_metrics_middleware_runs_async(event, settings):
+    settings.EVENTS_METRICS = {'SERVER_TIMING': True}
+    async def get_response(request):
+        return None
+
+    assert iscoroutinefunction(MetricsMiddleware(get_response))
+
+    response = async_to_sync(AsyncClient().get)(reverse('AsyncEventList'))
+
+    assert response.status_code == 200
+    assert int(response['Server-Timing'].split('"')[1].split()[0]) > 0
+
+
+@pytest.mark.django_db
+def test_seed_and_benchmark_commands(tmp_path):
+    call_command('seed_events', users=5, events=12, registrations_per_event=3, batch_size=5, stdout=io.StringIO())
+
+    assert User.objects.filter(username__startswith='seed_').count() == 5
+    assert Event.objects.count() == 12
+    assert sum(Event.objects.values_list('registrations_count', flat=True)) == Registration.objects.count()
+
+    output = tmp_path / 'benchmark.json'
+    call_command('benchmark', requests=2, warmup=0, output=str(output), host='testserver',
+                 only=['list', 'detail', 'my_registrations'], stdout=io.StringIO())
+    report = json.loads(output.read_text())
+
+    assert set(report['scenarios']) == {'list', 'detail', 'my_registrations'}
+    assert report['scenarios']['list']['status_codes'] == {'200': 2}
+
+
+@pytest.mark.django_db
+def test_event_search(api_client, event, user):
+    Event.objects.create(title='workshop de python', description='aprenda django', date='2025-06-14',
+                         time='10:00:00', local='laboratorio', capacity=10, category='tecnologia', creator=user)
+    response = api_client.get(reverse('ListCreate') + '?q=django', format='json')
+
+    assert response.status_code == 200
+    assert [item['title'] for item in response.data['results']] == ['workshop de python']
+
+    response = api_client.get(reverse('ListCreate') + '?q=inexistente', format='json')
+
+    assert response.status_code == 204
+
+@pytest.mark.django_db
+def test_event_search_rejects_cursor_pagination(api_client, event):
+    response = api_client.get(reverse('ListCreate') + '?q=teste&pagination=cursor', format='json')
+
+    assert response.status_code == 400
+    assert 'pagination' in response.data
+
+    response = async_to_sync(AsyncClient().get)(reverse('AsyncEventList') + '?q=teste&cursor=')
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_event_stats_are_maintained(auth_client, api_client, event):
+    url = reverse('Registration', kwargs={'pk': event.pk})
+    auth_client.post(url, format='json')
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get(reverse('ListCreate'), format='json')
+
+    assert response.data['results'][0]['registrations_count'] == 1
+    assert response.data['results'][0]['remaining_seats'] == 0
+    assert not any('events_registration' in query['sql'] for query in ctx)
+
+    response = auth_client.delete(url)
+
+    assert response.status_code == 204
+    response = api_client.get(reverse('ListUpdateDelete', kwargs={'pk': event.pk}), format='json')
+    assert response.data['registrations_count'] == 0
+    assert response.data['remaining_seats'] == 1
+
+@pytest.mark.django_db
+def test_recompute_event_stats(event, user):
+    Registration.objects.bulk_create([Registration(user=user, event=event)])
+    call_command('recompute_event_stats', stdout=io.StringIO())
+    event.refresh_from_db()
+
+    assert event.registrations_count == 1
+
+
+@pytest.mark.django_db
+def test_event_list_fast_path_matches_serializer(api_client, event):
+    response = api_client.get(reverse('ListCreate'), format='json')
+
+    assert response.data['results'] == [EventSerializer(Event.objects.get(pk=event.pk)).data]
+
+@pytest.mark.django_db
+def test_event_sparse_fieldsets(api_client, event):
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get(reverse('ListCreate') + '?fields=id,title,creator', format='json')
+
+    assert response.data['results'] == [{'id': event.pk, 'title': event.title, 'creator': 'rafael'}]
+    assert not any('"description"' in query['sql'] for query in ctx)
+
+    url = reverse('ListUpdateDelete', kwargs={'pk': event.pk}) + '?omit=description,creator'
+    response = api_client.get(url, format='json')
+
+    assert 'description' not in response.data and 'creator' not in response.data
+    assert response.data['remaining_seats'] == 1
+
+
+@pytest.mark.django_db
+def test_orjson_renderer_matches_json_renderer(event):
+    event.description = 'linha\u2028quebrada ção'
+    data = {'event': EventSerializer(event).data, 'when': datetime.datetime(2025, 6, 13, 10, 30, 0, 123456,
+                                                                                tzinfo=datetime.timezone.utc)}
+
+    assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+@pytest.mark.django_db
+def test_msgpack_negotiation(api_client, event):
+    msgpack = pytest.importorskip('msgpack')
+    response = api_client.get(reverse('ListUpdateDelete', kwargs={'pk': event.pk}), HTTP_ACCEPT='application/msgpack')
+
+    assert response['Content-Type'] == 'application/msgpack'
+    assert msgpack.unpackb(response.content)['date'] == '2025-06-13'
+
+@pytest.mark.django_db
+def test_bench_db_connections_command():
+    output = io.StringIO()
+    call_command('bench_db_connections', requests=3, stdout=output)
+
+    assert 'new: p50' in output.getvalue()
+    assert 'persistent: p50' in output.getvalue()
+
+
+def test_replica_weighted_round_robin(settings):
+    settings.EVENTS_REPLICAS = {'DATABASES': {'replica_a': 2, 'replica_b': 1}}
+    chosen = [routers.choose_replica() for _ in range(30)]
+
+    assert chosen.count('replica_a') == 20 and chosen.count('replica_b') == 10
+
+@pytest.fixture
+def replica_db(tmp_path):
+    # A second local database, migrated on its own, standing in for a replica.
+    alias = 'replica_test'
+    connections.settings[alias] = connections.configure_settings({
+        'default': connections.settings['default'],
+        alias: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(tmp_path / 'replica.sqlite3')},
+    })[alias]
+    # Connected up front: the test case only opens connections lazily for the
+    # aliases it was set up with.
+    connections[alias].connect()
+    call_command('migrate', database=alias, verbosity=0)
+    yield alias
+    connections[alias].close()
+    del connections[alias]
+    del connections.settings[alias]
+
+@pytest.mark.django_db
+def test_replica_reads_stick_to_primary_after_write(api_client, auth_client, event, user, replica_db, settings):
+    settings.EVENTS_REPLICAS = {'DATABASES': {replica_db: 1}, 'STICKY_SECONDS': 10}
+    User.objects.using(replica_db).create(id=user.id, username=user.username, password=user.password)
+    Event.objects.using(replica_db).create(title='so na replica', description='d', date='2025-06-13', time='10:00:00',
+                                           local='sala', capacity=5, category='saude', creator_id=user.id)
+    url = reverse('ListCreate')
+
+    with CaptureQueriesContext(connection) as primary, CaptureQueriesContext(connections[replica_db]) as replica:
+        response = api_client.get(url, format='json')
+
+    assert [row['title'] for row in response.data['results']] == ['so na replica']
+    assert response.data['count'] == 1
+    assert len(primary) == 0 and len(replica) >= 2
+
+    response = auth_client.post(reverse('Registration', kwargs={'pk': event.pk}), format='json')
+    assert response.status_code == 201
+    assert 'events_primary_until' in response.cookies
+
+    response = auth_client.get(url, format='json')
+    assert [row['title'] for row in response.data['results']] == [event.title]
+
+    auth_client.cookies.clear()
+    response = auth_client.get(reverse('ListMyResgistrations'), format='json')
+    assert response.status_code == 200
+    assert response.data['count'] == 1
+
+
+def test_replicas_warn_without_shared_cache(settings):
+    settings.EVENTS_REPLICAS = {'DATABASES': {'replica_1': 1}}
+    assert [warning.id for warning in check_replica_sticky_cache(None)] == ['events.W001']
+
+    settings.EVENTS_RESPONSE_CACHE = {**settings.EVENTS_RESPONSE_CACHE, 'SHARED': True}
+    assert check_replica_sticky_cache(None) == []
+
+@pytest.mark.django_db
+def test_replica_routing_in_async_views(event, user, replica_db, settings):
+    settings.EVENTS_REPLICAS = {'DATABASES': {replica_db: 1}}
+    async def get_response(request):
+        return None
+
+    assert iscoroutinefunction(routers.ReplicaRoutingMiddleware(get_response))
+
+    User.objects.using(replica_db).create(id=user.id, username=user.username, password=user.password)
+    Event.objects.using(replica_db).create(title='so na replica', description='d', date='2025-06-13', time='10:00:00',
+                                           local='sala', capacity=5, category='saude', creator_id=user.id)
+
+    response = async_to_sync(AsyncClient().get)(reverse('AsyncEventList'))
+
+    assert [row['title'] for row in json.loads(response.content)['results']] == ['so na replica']
+
+
+@pytest.mark.django_db
+def test_event_duplicate_check_excludes_instance(auth_client, event):
+    url = reverse('ListUpdateDelete', kwargs={'pk': event.pk})
+    response = auth_client.patch(url, {'capacity': 3}, format='json')
+
+    assert response.status_code == 200
+
+    data = {'title': event.title, 'description': 'outra', 'date': '2025-06-13', 'time': '16:37:21',
+            'local': 'outro lugar', 'capacity': 5, 'category': 'saude'}
+    response = auth_client.post(reverse('ListCreate'), data, format='json')
+
+    assert response.status_code == 400
+    assert response.data['non_field_errors'] == ['Já existe um evento neste local, data e horario.']
+
+@pytest.mark.django_db
+def test_idempotency_key_replays_first_response(auth_client, event):
+    url = reverse('Registration', kwargs={'pk': event.pk})
+    first = auth_client.post(url, format='json', HTTP_IDEMPOTENCY_KEY='abc-123')
+    retry = auth_client.post(url, format='json', HTTP_IDEMPOTENCY_KEY='abc-123')
+
+    assert first.status_code == 201
+    assert retry.status_code == 201
+    assert retry.data == first.data
+    assert retry['Idempotent-Replayed'] == 'true'
+    assert Registration.objects.filter(event=event).count() == 1
+
+    other = auth_client.post(reverse('ListCreate'), {'title': 'x'}, format='json', HTTP_IDEMPOTENCY_KEY='abc-123')
+    assert other.status_code == 422
+
+@pytest.mark.django_db
+def test_idempotency_key_in_progress_conflict(auth_client, event, user):
+    url = reverse('Registration', kwargs={'pk': event.pk})
+    IdempotencyKey.objects.create(user=user, key='abc-123', fingerprint=request_fingerprint(
+        APIRequestFactory().post(url)), expires_at=timezone.now() + datetime.timedelta(minutes=1))
+    response = auth_client.post(url, format='json', HTTP_IDEMPOTENCY_KEY='abc-123')
+
+    assert response.status_code == 409
+    assert not Registration.objects.filter(event=event).exists()
+
+@pytest.mark.django_db
+def test_idempotency_key_stale_lease_is_reclaimed(auth_client, event, user):
+    url = reverse('Registration', kwargs={'pk': event.pk})
+    record = IdempotencyKey.objects.create(user=user, key='abc-123', fingerprint=request_fingerprint(
+        APIRequestFactory().post(url)), expires_at=timezone.now() + datetime.timedelta(hours=1))
+    IdempotencyKey.objects.filter(pk=record.pk).update(created_at=timezone.now() - datetime.timedelta(minutes=1))
+    response = auth_client.post(url, format='json', HTTP_IDEMPOTENCY_KEY='abc-123')
+
+    assert response.status_code == 201
+    assert Registration.objects.filter(event=event).count() == 1
+    assert IdempotencyKey.objects.get(user=user, key='abc-123').response_status == 201
+
+
+@pytest.mark.django_db
+def test_register_throttled_before_authentication(auth_client, event, user, settings):
+    settings.EVENTS_THROTTLE = {'RATES': {'register.user': '2/min'}}
+    url = reverse('Registration', kwargs={'pk': event.pk})
+    first = auth_client.post(url, format='json')
+
+    assert first.status_code == 201
+    assert first['X-RateLimit-Limit'] == '2'
+    assert first['X-RateLimit-Remaining'] == '1'
+
+    auth_client.post(url, format='json')
+    with CaptureQueriesContext(connection) as ctx:
+        for _ in range(2):
+            response = auth_client.post(url, format='json')
+
+    assert response.status_code == 429
+    assert int(response['Retry-After']) > 0
+    assert response['X-RateLimit-Remaining'] == '0'
+    assert len(ctx) == 0
+
+@pytest.mark.django_db
+def test_token_endpoint_throttled_by_ip(api_client, user, settings):
+    settings.EVENTS_THROTTLE = {'RATES': {'token.ip': '1/min'}}
+    url = reverse('TokenObtainPair')
+    data = {'username': user.username, 'password': 'errada'}
+
+    assert api_client.post(url, data, format='json').status_code == 401
+    assert api_client.post(url, data, format='json').status_code == 429
+
+
+@pytest.mark.django_db
+def test_throttle_window_slides_across_boundary(api_client, user, settings, monkeypatch):
+    settings.EVENTS_THROTTLE = {'RATES': {'token.ip': '2/min'}}
+    clock = [60 * 1000 + 50]
+    monkeypatch.setattr(SlidingWindowThrottle, 'timer', staticmethod(lambda: clock[0]))
+    url = reverse('TokenObtainPair')
+    data = {'username': user.username, 'password': 'errada'}
+
+    assert api_client.post(url, data, format='json').status_code == 401
+    assert api_client.post(url, data, format='json').status_code == 401
+
+    # A fixed window would start over here and let two more through.
+    clock[0] = 60 * 1001 + 5
+    response = api_client.post(url, data, format='json')
+    assert response.status_code == 429
+    assert int(response['Retry-After']) == 25
+
+    clock[0] = 60 * 1001 + 40
+    assert api_client.post(url, data, format='json').status_code == 401
+
+@pytest.mark.django_db
+def test_ip_throttle_ignores_forged_forwarded_for(api_client, user, settings):
+    settings.EVENTS_THROTTLE = {'RATES': {'token.ip': '1/min'}}
+    url = reverse('TokenObtainPair')
+    data = {'username': user.username, 'password': 'errada'}
+
+    assert api_client.post(url, data, format='json', HTTP_X_FORWARDED_FOR='10.0.0.1').status_code == 401
+    assert api_client.post(url, data, format='json', HTTP_X_FORWARDED_FOR='10.0.0.2').status_code == 429
+
+@pytest.mark.django_db
+def test_bulk_registration_throttled(auth_client, event, settings):
+    settings.EVENTS_THROTTLE = {'RATES': {'bulk_register.user': '1/min'}}
+    url = reverse('BulkRegistration')
+    data = {'registrations': [{'event': event.pk}]}
+
+    assert auth_client.post(url, data, format='json').status_code == 200
+    assert auth_client.post(url, data, format='json').status_code == 429
+
+
+@pytest.mark.django_db
+def test_event_stats(api_client, event, user, shared_cache):
+    Event.objects.create(title='outro', description='d', date='2025-06-20', time='10:00:00', local='sala',
+                         capacity=10, category='saude', creator=user)
+    Event.objects.create(title='mais um', description='d', date='2025-07-01', time='10:00:00', local='sala',
+                         capacity=5, category='saude', creator=user)
+    Registration.objects.bulk_create([Registration(user=user, event=event)])
+    Event.objects.filter(pk=event.pk).update(registrations_count=1)
+    url = reverse('EventStats')
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get(url, format='json')
+
+    assert response.data['totals'] == {'events': 3, 'capacity': 16, 'registrations': 1}
+    assert response.data['by_category'] == [
+        {'category': 'tecnologia', 'events': 1, 'capacity': 1, 'registrations': 1},
+        {'category': 'saude', 'events': 2, 'capacity': 15, 'registrations': 0},
+    ]
+    assert [(row['month'], row['events']) for row in response.data['by_month']] == [('2025-06', 2), ('2025-07', 1)]
+    assert [row['date'] for row in response.data['by_day']] == ['2025-06-13', '2025-06-20', '2025-07-01']
+    assert len(ctx) == 4
+
+    response = api_client.get(url + '?category=saude&group=month', format='json')
+    assert response.data['totals']['events'] == 2
+    assert set(response.data) == {'totals', 'by_month'}
+
+
+@pytest.mark.django_db
+def test_archive_events_and_include_archived(api_client, event, user):
+    upcoming = Event.objects.create(title='futuro', description='d', date='2099-01-01', time='10:00:00',
+                                    local='sala', capacity=10, category='saude', creator=user)
+    Registration.objects.bulk_create([Registration(user=user, event=event)])
+    call_command('archive_events', before=datetime.date(2030, 1, 1), batch_size=1, stdout=io.StringIO())
+
+    assert list(Event.objects.values_list('id', flat=True)) == [upcoming.pk]
+    assert ArchivedEvent.objects.get().id == event.pk
+    assert ArchivedRegistration.objects.get().event_id == event.pk
+    assert not Registration.objects.exists()
+
+    url = reverse('ListCreate')
+    response = api_client.get(url, format='json')
+    assert [row['id'] for row in response.data['results']] == [upcoming.pk]
+
+    response = api_client.get(url + '?include_archived=true', format='json')
+    assert [row['id'] for row in response.data['results']] == [event.pk, upcoming.pk]
+    assert response.data['results'][0]['creator'] == 'rafael'
+
+    response = api_client.get(url + '?include_archived=only&category=tecnologia&fields=id,title', format='json')
+    assert response.data['results'] == [{'id': event.pk, 'title': event.title}]
+
+@pytest.mark.django_db
+def test_my_registrations_include_archived(auth_client, event, user):
+    upcoming = Event.objects.create(title='futuro', description='d', date='2099-01-01', time='10:00:00',
+                                    local='sala', capacity=10, category='saude', creator=user)
+    Registration.objects.bulk_create([Registration(user=user, event=event), Registration(user=user, event=upcoming)])
+    Event.objects.filter(pk__in=[event.pk, upcoming.pk]).update(registrations_count=1)
+    call_command('archive_events', before=datetime.date(2030, 1, 1), stdout=io.StringIO())
+
+    assert Event.objects.get(pk=upcoming.pk).registrations_count == 1
+    url = reverse('ListMyResgistrations')
+    assert auth_client.get(url + '?when=past', format='json').status_code == 404
+
+    response = auth_client.get(url + '?when=past&include_archived=true', format='json')
+    assert [row['event'] for row in response.data['results']] == [event.title]
+
+    response = auth_client.get(url + '?include_archived=true', format='json')
+    assert sorted(row['event'] for row in response.data['results']) == ['futuro', event.title]
+    assert response.data['results'][0]['user'] == 'rafael'
+
+    response = auth_client.get(url + '?include_archived=only&cursor=', format='json')
+    assert [row['event'] for row in response.data['results']] == [event.title]
@@ -0,0 +1,184 @@
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .authentication import token_user_id
+from .cache import get_cache
+
+DEFAULTS = {
+    'ENABLED': True,
+    # '<view throttle_scope>.<user|ip>': 'requests/period'
+    'RATES': {
+        'token.ip': '20/min',
+        'register.user': '30/min',
+        'register.ip': '120/min',
+        'bulk_register.user': '10/min',
+        'bulk_register.ip': '30/min',
+    },
+    # Keys remembered by the in-process fast path before expired ones are pruned.
+    'MAX_LOCAL_KEYS': 10000,
+}
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def throttle_settings():
+    return {**DEFAULTS, **getattr(settings, 'EVENTS_THROTTLE', {})}
+
+
+def parse_rate(rate):
+    number, period = rate.split('/')
+    return int(number), PERIODS[period[0]]
+
+
+class LocalBlocks:
+    # Keys that already hit their limit in this process, with the time the
+    # next request fits again. Requests for them are rejected without touching
+    # the cache.
+
+    def __init__(self):
+        self.until = {}
+        self.lock = threading.Lock()
+
+    def blocked(self, key, now):
+        return self.until.get(key, 0) > now
+
+    def block(self, key, until, max_keys):
+        with self.lock:
+            if len(self.until) >= max_keys:
+                now = time.time()
+                self.until = {name: value for name, value in self.until.items() if value > now}
+            self.until[key] = until
+
+    def clear(self):
+        with self.lock:
+            self.until.clear()
+
+
+local_blocks = LocalBlocks()
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    # Sliding window over two fixed windows of `period` seconds: the count of
+    # the previous window is weighted by the part of it still inside the last
+    # `period` seconds, so a burst around a boundary can not reach twice the
+    # limit. The shared state is one counter per key and window in the events
+    # cache, taken with add()/incr(), both atomic on memcached/redis.
+    kind = None
+    timer = time.time
+    limit = remaining = reset_at = None
+
+    def get_ident_key(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        config = throttle_settings()
+        scope = getattr(view, 'throttle_scope', None)
+        rate = config['RATES'].get(f'{scope}.{self.kind}') if config['ENABLED'] and scope else None
+        if rate is None:
+            return True
+        ident = self.get_ident_key(request)
+        if ident is None:
+            return True
+
+        self.limit, period = parse_rate(rate)
+        now = self.timer()
+        window, elapsed = divmod(now, period)
+        window = int(window)
+        # The current window's count starts sliding out at its end.
+        self.reset_at = (window + 1) * period
+        key = f'{scope}.{self.kind}:{ident}'
+        if local_blocks.blocked(key, now):
+            self.remaining = 0
+            self.reset_at = local_blocks.until.get(key, now)
+            return False
+
+        cache = get_cache()
+        cache_key = f'events:throttle:{key}:{window}'
+        previous = cache.get(f'events:throttle:{key}:{window - 1}', 0)
+        if cache.add(cache_key, 1, 2 * period + 1):
+            current = 1
+        else:
+            try:
+                current = cache.incr(cache_key)
+            except ValueError:
+                cache.set(cache_key, 1, 2 * period + 1)
+                current = 1
+        weight = 1 - elapsed / period
+        used = previous * weight + current
+        self.remaining = max(int(self.limit - used), 0)
+        if used <= self.limit:
+            return True
+
+        # Only accepted requests are counted.
+        try:
+            current = cache.decr(cache_key)
+        except ValueError:
+            current = 0
+        self.reset_at = self.retry_at(window, period, previous, current)
+        local_blocks.block(key, self.reset_at, config['MAX_LOCAL_KEYS'])
+        return False
+
+    def retry_at(self, window, period, previous, current):
+        # First moment the weighted count leaves room for one more request.
+        room = self.limit - 1
+        if current <= room:
+            return (window + max(1 - (room - current) / previous, 0)) * period if previous else self.timer()
+        # Only once this window has become the previous one.
+        return (window + 1 + 1 - room / current) * period
+
+    def wait(self):
+        return max(self.reset_at - self.timer(), 0)
+
+
+class UserSlidingWindowThrottle(SlidingWindowThrottle):
+    # Identity from the access token claims, so no user query is needed.
+    kind = 'user'
+
+    def get_ident_key(self, request):
+        return token_user_id(request)
+
+
+class IPSlidingWindowThrottle(SlidingWindowThrottle):
+    kind = 'ip'
+
+    def get_ident_key(self, request):
+        # BaseThrottle.get_ident takes X-Forwarded-For as is when NUM_PROXIES
+        # is not set, so a client could rotate it to get a fresh window.
+        if api_settings.NUM_PROXIES:
+            return self.get_ident(request)
+        return request.META.get('REMOTE_ADDR')
+
+
+class EarlyThrottleMixin:
+    # Checks throttles before authentication and permissions, so rejected
+    # requests cost no database query, and adds X-RateLimit-* headers.
+    throttle_classes = [UserSlidingWindowThrottle, IPSlidingWindowThrottle]
+
+    def initial(self, request, *args, **kwargs):
+        self.check_throttles(request)
+        super().initial(request, *args, **kwargs)
+
+    def check_throttles(self, request):
+        if getattr(self, 'checked_throttles', None) is not None:
+            return
+        self.checked_throttles = []
+        for throttle in self.get_throttles():
+            allowed = throttle.allow_request(request, self)
+            if throttle.limit is not None:
+                self.checked_throttles.append(throttle)
+            if not allowed:
+                self.throttled(request, throttle.wait())
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        throttles = getattr(self, 'checked_throttles', None)
+        if throttles:
+            tightest = min(throttles, key=lambda throttle: throttle.remaining)
+            response['X-RateLimit-Limit'] = str(tightest.limit)
+            response['X-RateLimit-Remaining'] = str(tightest.remaining)
+            response['X-RateLimit-Reset'] = str(int(tightest.reset_at))
+        return response
@@ -1,22 +1,35 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from . import views
+from rest_framework_simplejwt.views import TokenRefreshView
+from . import views, async_views
+from .metrics import metrics_view
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 
 
 urlpatterns = [
+    path('metrics', metrics_view, name='metrics'),
+
     path('api/schema', SpectacularAPIView.as_view(), name='schema'),
     path('api/docs/swagger', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('api/docs/redoc', SpectacularRedocView.as_view(url_name='schema'),name='redoc'),
 
-    path('api/token',TokenObtainPairView.as_view(), name='TokenObtainPair'),
+    path('api/token', views.ThrottledTokenObtainPairView.as_view(), name='TokenObtainPair'),
     path('api/refresh', TokenRefreshView.as_view(), name='TokenRefresh'),
 
     path('api/events', views.ListCreateView.as_view(), name='ListCreate'),
+    path('api/events/import', views.ImportEvents.as_view(), name='ImportEvents'),
+    path('api/events/export', views.ExportEvents.as_view(), name='ExportEvents'),
+    path('api/events/stats', views.EventStats.as_view(), name='EventStats'),
     path('api/events/<int:pk>', views.ListUpdateDeleteView.as_view(), name='ListUpdateDelete'),
     path('api/user/create', views.CreateUser.as_view(), name='CreateUser'),
 
     path('api/events/<int:pk>/register', views.CreateRegistration.as_view(), name='Registration'),
-    path('api/my-registrations', views.ListMyRegistrations.as_view(), name='ListMyResgistrations')
+    path('api/events/<int:pk>/registrations/export', views.ExportRegistrations.as_view(), name='ExportRegistrations'),
+    path('api/registration-tickets/<int:pk>', views.RetrieveRegistrationTicket.as_view(), name='RegistrationTicket'),
+    path('api/registrations/bulk', views.BulkRegistration.as_view(), name='BulkRegistration'),
+    path('api/my-registrations', views.ListMyRegistrations.as_view(), name='ListMyResgistrations'),
+
+    path('api/async/events', async_views.event_list, name='AsyncEventList'),
+    path('api/async/events/<int:pk>', async_views.event_detail, name='AsyncEventDetail'),
+    path('api/async/my-registrations', async_views.my_registrations, name='AsyncMyRegistrations'),
 
 ]
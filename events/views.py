@@ -1,15 +1,33 @@
-from django.shortcuts import render
+from django.shortcuts import render, get_object_or_404
 from rest_framework import generics
-from .models import Event, Registration
-from .serializers import EventSerializer,RegistrationSerializer, UserSerializer
+from .models import ArchivedEvent, ArchivedRegistration, Event, Registration, RegistrationRequest
+from .serializers import (EventSerializer,RegistrationSerializer, UserSerializer, BulkRegistrationSerializer,
+                          RegistrationRequestSerializer)
 from .permissions import IsAutheticatedOrReadOnly, IsOwnerOrReadOnly, IsAdminUser
 from django.contrib.auth.models import User
-from .filters import EventFilter
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
+from rest_framework.permissions import IsAuthenticated
+from .filters import SEARCH_CURSOR_MESSAGE, EventFilter, RegistrationFilter
+from .pagination import PageOrKeysetPagination, keyset_requested
+from .archive import include_archived
+from .cache import CachedResponseMixin
+from .fieldsets import SparseEventViewMixin
+from .idempotency import IdempotencyMixin
+from .throttling import EarlyThrottleMixin
+from .conditional import conditional_event, conditional_event_list
+from .importers import import_events
+from .stats import GROUPS, event_stats
+from .exporters import (CSVRenderer, NDJSONRenderer, EVENT_COLUMNS, REGISTRATION_COLUMNS, event_row,
+                        registration_row, stream_rows)
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.exceptions import NotAuthenticated, NotFound
+from rest_framework.exceptions import NotAuthenticated, NotFound, PermissionDenied, ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Count
+from rest_framework_simplejwt.views import TokenObtainPairView
 # Create your views here.
 
 class CreateUser(generics.CreateAPIView):
@@ -17,55 +35,217 @@ class CreateUser(generics.CreateAPIView):
     serializer_class = UserSerializer
     permission_classes = [IsAdminUser]
 
-class ListCreateView(generics.ListCreateAPIView):
+@conditional_event_list
+class ListCreateView(IdempotencyMixin, CachedResponseMixin, SparseEventViewMixin, generics.ListCreateAPIView):
     
-    queryset = Event.objects.all()
+    queryset = Event.objects.select_related('creator')
     serializer_class = EventSerializer
     permission_classes = [IsAutheticatedOrReadOnly]
+    cache_namespace = 'event-list'
+    replica_reads = True
     filter_backends = [DjangoFilterBackend]
     filterset_class = EventFilter
+    pagination_class = PageOrKeysetPagination
+    keyset_ordering = ('date', 'id')
 
     def perform_create(self, serializer):
         serializer.save(creator=self.request.user)
 
     def list(self, request, *args, **kwargs):
+        if include_archived(request) == 'all' and keyset_requested(request):
+            raise ValidationError({'pagination': 'Paginação por cursor não disponível com include_archived.'})
+        if request.query_params.get('q') and keyset_requested(request):
+            # The cursor orders by (date, id), which would drop the search ranking.
+            raise ValidationError({'pagination': SEARCH_CURSOR_MESSAGE})
         queryset = self.filter_queryset(self.get_queryset())
-        if not queryset:
+        if not queryset.exists():
             return Response([], status=status.HTTP_204_NO_CONTENT)
         return super().list(request, *args, **kwargs)
     
     def get_queryset(self):
-        return Event.objects.select_related('creator').annotate(num_registration=Count('registration')).order_by('id')
+        if self.request.method == 'GET' and include_archived(self.request) == 'only':
+            return self.restrict_columns(ArchivedEvent.objects.select_related('creator')).order_by('id')
+        return super().get_queryset().order_by('id')
 
-class ListUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Event.objects.all()
+    def filter_queryset(self, queryset):
+        if queryset.model is ArchivedEvent:
+            return EventFilter(self.request.query_params, queryset=queryset, request=self.request).qs
+        queryset = super().filter_queryset(queryset)
+        if self.request.method != 'GET' or include_archived(self.request) != 'all':
+            return queryset
+        # Both sides select the same columns in the same order (restrict_columns),
+        # so the UNION lines up; filters are applied to each side before it.
+        archived = self.restrict_columns(ArchivedEvent.objects.select_related('creator'))
+        archived = EventFilter(self.request.query_params, queryset=archived, request=self.request).qs
+        return queryset.order_by().union(archived.order_by(), all=True).order_by('id')
+
+@conditional_event
+class ListUpdateDeleteView(CachedResponseMixin, SparseEventViewMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Event.objects.select_related('creator')
     serializer_class = EventSerializer
     permission_classes = [IsOwnerOrReadOnly]
+    cache_namespace = 'event-detail'
+    replica_reads = True
 
-class CreateRegistration(generics.CreateAPIView):
+class CreateRegistration(EarlyThrottleMixin, IdempotencyMixin, generics.CreateAPIView):
     queryset = Registration.objects.all()
+    throttle_scope = 'register'
     serializer_class = RegistrationSerializer
     permission_classes = [IsAutheticatedOrReadOnly]
 
+    def create(self, request, *args, **kwargs):
+        if getattr(settings, 'EVENTS_REGISTRATION_MODE', 'direct') != 'queued':
+            return super().create(request, *args, **kwargs)
+        if not Event.objects.filter(pk=self.kwargs['pk']).exists():
+            raise NotFound('Evento não encontrado.')
+        ticket = RegistrationRequest.objects.create(user=request.user, event_id=self.kwargs['pk'])
+        data = RegistrationRequestSerializer(ticket).data
+        data['url'] = request.build_absolute_uri(reverse('RegistrationTicket', kwargs={'pk': ticket.pk}))
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+
     def perform_create(self, serializer):
-        event = Event.objects.get(pk=self.kwargs['pk'])
+        event = get_object_or_404(Event.objects.only('id', 'title'), pk=self.kwargs['pk'])
         serializer.save(user=self.request.user, event=event)
 
+    def delete(self, request, *args, **kwargs):
+        registration = get_object_or_404(Registration, event_id=self.kwargs['pk'], user_id=request.user.id)
+        with transaction.atomic():
+            registration.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class RetrieveRegistrationTicket(generics.RetrieveAPIView):
+    serializer_class = RegistrationRequestSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return RegistrationRequest.objects.filter(user_id=self.request.user.id)
+
+class BulkRegistration(EarlyThrottleMixin, generics.GenericAPIView):
+    serializer_class = BulkRegistrationSerializer
+    permission_classes = [IsAutheticatedOrReadOnly]
+    throttle_scope = 'bulk_register'
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save(actor=request.user)
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+class ImportEvents(generics.GenericAPIView):
+    permission_classes = [IsAutheticatedOrReadOnly]
+    parser_classes = [MultiPartParser]
+    batch_size = 1000
+    max_batch_size = 5000
+
+    def post(self, request, *args, **kwargs):
+        try:
+            batch_size = min(int(request.query_params.get('batch_size', self.batch_size)), self.max_batch_size)
+        except ValueError:
+            batch_size = self.batch_size
+        if request.content_type.startswith('multipart/'):
+            upload = request.FILES.get('file')
+            if upload is None:
+                raise ValidationError({'file': 'Envie o arquivo no campo file.'})
+            source = upload
+            fmt = 'ndjson' if upload.name.endswith(('.ndjson', '.jsonl')) else 'csv'
+        else:
+            source = request._request
+            fmt = 'ndjson' if 'ndjson' in request.content_type else 'csv'
+        report = import_events(source, fmt, creator=request.user, batch_size=max(batch_size, 1))
+        return Response(report, status=status.HTTP_200_OK)
+
+class EventStats(CachedResponseMixin, generics.ListAPIView):
+    queryset = Event.objects.all()
+    permission_classes = [IsAutheticatedOrReadOnly]
+    cache_namespace = 'event-stats'
+    replica_reads = True
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = EventFilter
+
+    def list(self, request, *args, **kwargs):
+        groups = request.query_params.get('group')
+        groups = [group.strip() for group in groups.split(',')] if groups else GROUPS
+        invalid = [group for group in groups if group not in GROUPS]
+        if invalid:
+            raise ValidationError({'group': f'Agrupamentos inválidos: {", ".join(invalid)}.'})
+        return Response(event_stats(self.filter_queryset(self.get_queryset()), groups))
+
+class ExportEvents(generics.GenericAPIView):
+    queryset = Event.objects.all()
+    permission_classes = [IsAutheticatedOrReadOnly]
+    renderer_classes = [CSVRenderer, NDJSONRenderer]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = EventFilter
+    chunk_size = 2000
+
+    def get(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).select_related('creator').order_by('id')
+        rows = (event_row(event) for event in queryset.iterator(chunk_size=self.chunk_size))
+        return export_response(request, 'eventos', EVENT_COLUMNS, rows)
+
+class ExportRegistrations(generics.GenericAPIView):
+    queryset = Registration.objects.all()
+    permission_classes = [IsAutheticatedOrReadOnly]
+    renderer_classes = [CSVRenderer, NDJSONRenderer]
+    chunk_size = 2000
+
+    def get(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            raise NotAuthenticated('Você deve estar logado para exportar as inscrições.')
+        event = get_object_or_404(Event.objects.only('id', 'creator_id'), pk=self.kwargs['pk'])
+        if event.creator_id != request.user.id and not request.user.is_staff:
+            raise PermissionDenied('Apenas o organizador pode exportar as inscrições.')
+        queryset = Registration.objects.filter(event_id=event.pk).select_related('user').order_by('id')
+        rows = (registration_row(registration) for registration in queryset.iterator(chunk_size=self.chunk_size))
+        return export_response(request, f'inscricoes-evento-{event.pk}', REGISTRATION_COLUMNS, rows)
+
+def export_response(request, name, columns, rows):
+    renderer = request.accepted_renderer
+    response = StreamingHttpResponse(stream_rows(renderer.format, columns, rows),
+                                     content_type=f'{renderer.media_type}; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{name}.{renderer.format}"'
+    return response
+
 class ListMyRegistrations(generics.ListAPIView):
     queryset = Registration.objects.all()
     serializer_class = RegistrationSerializer
     permission_classes = [IsOwnerOrReadOnly]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = RegistrationFilter
+    pagination_class = PageOrKeysetPagination
+    keyset_ordering = ('registration_date', 'id')
+    replica_reads = True
+
+    def list(self, request, *args, **kwargs):
+        if include_archived(request) == 'all' and keyset_requested(request):
+            raise ValidationError({'pagination': 'Paginação por cursor não disponível com include_archived.'})
+        return super().list(request, *args, **kwargs)
 
     def get_queryset(self):
         user = self.request.user
-        registration = Registration.objects.filter(user_id=self.request.user.id)
         if not user.is_authenticated:
             raise NotAuthenticated('Você deve estar logado para acessar Minhas Inscrições.')
-        if user.is_authenticated and len(registration) == 0:
-            raise NotFound('Sem inscrições.')
-        return registration
+        model = ArchivedRegistration if include_archived(self.request) == 'only' else Registration
+        return self.restrict_columns(model.objects.filter(user_id=user.id)).order_by(*self.keyset_ordering)
 
-        
+    def restrict_columns(self, queryset):
+        # The serializer only reads these, and both models then select the same
+        # columns in the same order for the UNION of include_archived=all.
+        return queryset.select_related('user', 'event').only('registration_date', 'user__username', 'event__title')
+
+    def filter_queryset(self, queryset):
+        if queryset.model is ArchivedRegistration:
+            queryset = RegistrationFilter(self.request.query_params, queryset=queryset, request=self.request).qs
+        else:
+            queryset = super().filter_queryset(queryset)
+        if include_archived(self.request) == 'all':
+            archived = self.restrict_columns(ArchivedRegistration.objects.filter(user_id=self.request.user.id))
+            archived = RegistrationFilter(self.request.query_params, queryset=archived, request=self.request).qs
+            queryset = queryset.order_by().union(archived.order_by(), all=True).order_by(*self.keyset_ordering)
+        if not queryset.exists():
+            raise NotFound('Sem inscrições.')
+        return queryset
 
-       
-       
+class ThrottledTokenObtainPairView(EarlyThrottleMixin, TokenObtainPairView):
+    # Each attempt costs a password hash; rejected ones never reach it.
+    throttle_scope = 'token'
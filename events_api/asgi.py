@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'events_api.settings')
+# Picks the ASGI connection defaults in settings (pool instead of persistent connections).
+os.environ.setdefault('EVENTS_SERVER', 'asgi')
 
 application = get_asgi_application()
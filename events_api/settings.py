@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,6 +47,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'events.metrics.MetricsMiddleware',
+    'events.routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -80,14 +84,64 @@ WSGI_APPLICATION = 'events_api.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'Eventos',
-        'USER': 'postgres',
-        'PASSWORD': 'rafael123.',
-        'HOST': 'localhost',
-        'PORT': '5432',
+        'NAME': os.environ.get('EVENTS_DB_NAME', 'Eventos'),
+        'USER': os.environ.get('EVENTS_DB_USER', 'postgres'),
+        'PASSWORD': os.environ.get('EVENTS_DB_PASSWORD', 'rafael123.'),
+        'HOST': os.environ.get('EVENTS_DB_HOST', 'localhost'),
+        'PORT': os.environ.get('EVENTS_DB_PORT', '5432'),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
 
+# Connection reuse. Under WSGI each worker thread keeps its connection for
+# EVENTS_DB_CONN_MAX_AGE seconds. Under ASGI (events_api/asgi.py sets
+# EVENTS_SERVER) every request may run on a different thread, so persistent
+# connections are off there and the psycopg 3 pool is used instead when
+# installed. EVENTS_DB_POOL=1/0 forces the pool on or off.
+ASGI_SERVER = os.environ.get('EVENTS_SERVER') == 'asgi'
+DB_POOL = (os.environ.get('EVENTS_DB_POOL', '1' if ASGI_SERVER else '0') == '1'
+           and bool(find_spec('psycopg') and find_spec('psycopg_pool')))
+
+if DB_POOL:
+    from psycopg_pool import ConnectionPool
+
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.environ.get('EVENTS_DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('EVENTS_DB_POOL_MAX_SIZE', 10)),
+            'max_lifetime': float(os.environ.get('EVENTS_DB_POOL_MAX_LIFETIME', 1800)),
+            'max_idle': float(os.environ.get('EVENTS_DB_POOL_MAX_IDLE', 300)),
+            'timeout': float(os.environ.get('EVENTS_DB_POOL_TIMEOUT', 10)),
+            'check': ConnectionPool.check_connection,
+        },
     }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('EVENTS_DB_CONN_MAX_AGE', 0 if ASGI_SERVER else 60))
+
+
+# Read replicas: EVENTS_DB_REPLICAS="host1:5432=3,host2/eventos_replica" adds
+# one alias per entry (port, database name and weight optional) with the
+# primary's credentials.
+# Reads from views marked replica_reads go to them (events.routers).
+EVENTS_REPLICAS = {
+    'DATABASES': {},
+    'STICKY_SECONDS': int(os.environ.get('EVENTS_DB_STICKY_SECONDS', 10)),
 }
+for index, spec in enumerate(filter(None, os.environ.get('EVENTS_DB_REPLICAS', '').split(',')), start=1):
+    address, _, weight = spec.strip().partition('=')
+    address, _, name = address.partition('/')
+    host, _, port = address.partition(':')
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'NAME': name or DATABASES['default']['NAME'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    EVENTS_REPLICAS['DATABASES'][f'replica_{index}'] = int(weight or 1)
+
+DATABASE_ROUTERS = ['events.routers.PrimaryReplicaRouter']
 
 
 # Password validation
@@ -132,19 +186,83 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Point 'events' at a shared backend (Redis, Memcached) when running several
+# workers or nodes. With locmem each process only sees its own cache version, so
+# list ETags and response cache keys also carry a stamp of the events table
+# (one aggregate query per request).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'events': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'events-responses',
+        'TIMEOUT': 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+            'CULL_FREQUENCY': 4,
+        },
+    },
+}
+
+# 'queued' answers POST /api/events/<pk>/register with 202 and a ticket; the
+# process_registrations command applies the queued requests in batches.
+EVENTS_REGISTRATION_MODE = 'direct'
+
+# Metrics on /metrics (Prometheus text format). Set EVENTS_METRICS_DIR to a
+# directory shared by the workers of a host to add up every process.
+EVENTS_METRICS = {
+    'SERVER_TIMING': False,
+}
+
+EVENTS_USER_CACHE = {
+    'TIMEOUT': 30,
+    'MAX_SIZE': 1024,
+}
+
+EVENTS_RESPONSE_CACHE = {
+    'ALIAS': 'events',
+    'TIMEOUT': 60,
+}
+
+
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
 
+    # 'events.authentication.CachedJWTAuthentication' skips the per request User
+    # query (see EVENTS_USER_CACHE); 'rest_framework_simplejwt.authentication.
+    # JWTStatelessUserAuthentication' builds the user from the token claims alone.
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
 
+    # orjson is used when installed; MessagePack is only offered when msgpack is.
+    'DEFAULT_RENDERER_CLASSES': [
+        'events.renderers.ORJSONRenderer',
+        *(['events.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'events.renderers.ORJSONParser',
+        *(['events.renderers.MessagePackParser'] if find_spec('msgpack') else []),
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
 
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+
+    # Trusted reverse proxies in front of the app, each appending to
+    # X-Forwarded-For. Unset, the per IP throttles use REMOTE_ADDR, since the
+    # header as sent by the client can be forged.
+    'NUM_PROXIES': int(os.environ['EVENTS_NUM_PROXIES']) if os.environ.get('EVENTS_NUM_PROXIES') else None,
 }
 
 SWAGGER_SETTINGS = {